@@ -4,10 +4,11 @@ Provides the same interface as kodak/shared/db.py but uses PostgreSQL.
 """
 import os
 import logging
+import threading
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
-from typing import List, Dict, Any, Optional, Generator
+from typing import List, Dict, Any, Optional, Generator, Tuple
 
 # Import SQL translation
 from heroku.sql_compat import translate_query
@@ -134,6 +135,50 @@ def get_db_connection() -> Generator[Any, None, None]:
         conn.close()
 
 
+_thread_local = threading.local()
+
+def get_read_connection():
+    """
+    Returns this thread's long-lived read-only connection, opening it on first use.
+    Autocommit, so every query sees fresh data. Do not close it.
+    """
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is None or conn._conn.closed:
+        if not DATABASE_URL:
+            raise ValueError("DATABASE_URL environment variable not set")
+        raw = psycopg2.connect(DATABASE_URL)
+        raw.set_session(readonly=True, autocommit=True)
+        conn = _thread_local.conn = TranslatingConnection(raw)
+    return conn
+
+
+def get_db_version() -> Tuple[Any, ...]:
+    """
+    Change token used as a cache key for DB-derived data.
+    PostgreSQL has no file to stat, so use row counts and highest ids of the ledger and
+    instruments, plus the statistics counters that also move on in-place UPDATE/DELETE.
+    """
+    return tuple(get_read_connection().execute("""
+        SELECT
+            (SELECT COUNT(*) FROM transactions),
+            (SELECT MAX(id) FROM transactions),
+            (SELECT COUNT(*) FROM instruments),
+            (SELECT MAX(id) FROM instruments),
+            (SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0)
+             FROM pg_stat_user_tables WHERE relname IN ('transactions', 'instruments'))
+    """).fetchone())
+
+
+def disk_cache(name: str, max_age: Optional[float] = None):
+    """
+    No-op on Heroku: dyno filesystems are ephemeral and the app process keeps its
+    own in-memory caches, so results are not persisted to disk.
+    """
+    def decorator(func):
+        return func
+    return decorator
+
+
 def create_backup(label: str = "manual") -> str:
     """
     Backup stub for PostgreSQL.
@@ -9,6 +9,20 @@ from rich.panel import Panel
 config = load_config()
 BASE_CURRENCY = config.get('base_currency', 'NOK')
 
+def _add_rows(table: Table, *columns):
+    """Adds one table row per position across pre-formatted columns."""
+    for cells in zip(*columns):
+        table.add_row(*cells)
+
+
+def _fmt_text(values) -> list:
+    return values.fillna('').astype(str).tolist()
+
+
+def _fmt_total(values) -> list:
+    return values.map('{:,.0f}'.format).tolist()
+
+
 def run_dividend_report():
     console = Console()
     df_yearly, df_2025, df_all = get_dividend_details()
@@ -18,8 +32,7 @@ def run_dividend_report():
     table_yearly.add_column("Year", style="cyan")
     table_yearly.add_column(f"Total Dividends ({BASE_CURRENCY})", justify="right", style="green")
 
-    for _, row in df_yearly.iterrows():
-        table_yearly.add_row(row['year'], f"{row['total']:,.0f}")
+    _add_rows(table_yearly, _fmt_text(df_yearly['year']), _fmt_total(df_yearly['total']))
 
     console.print(table_yearly)
 
@@ -28,8 +41,8 @@ def run_dividend_report():
     table_2025.add_column("Instrument", style="magenta")
     table_2025.add_column(f"Total ({BASE_CURRENCY})", justify="right", style="green")
 
-    for _, row in df_2025.head(10).iterrows():
-        table_2025.add_row(row['symbol'], f"{row['total']:,.0f}")
+    top_2025 = df_2025.head(10)
+    _add_rows(table_2025, _fmt_text(top_2025['symbol']), _fmt_total(top_2025['total']))
 
     console.print(table_2025)
 
@@ -38,8 +51,8 @@ def run_dividend_report():
     table_all.add_column("Instrument", style="magenta")
     table_all.add_column(f"Total ({BASE_CURRENCY})", justify="right", style="green")
 
-    for _, row in df_all.head(15).iterrows():
-        table_all.add_row(row['symbol'], f"{row['total']:,.0f}")
+    top_all = df_all.head(15)
+    _add_rows(table_all, _fmt_text(top_all['symbol']), _fmt_total(top_all['total']))
 
     console.print(table_all)
 
@@ -75,17 +88,17 @@ def run_dividend_forecast():
     table.add_column(f"Est. ({BASE_CURRENCY})", justify="right", style="green")
     table.add_column("Source", justify="center", style="dim")
 
-    for _, row in df.iterrows():
-        source_style = "green" if row['source'] == 'yahoo' else "yellow"
-        table.add_row(
-            row['symbol'],
-            f"{row['quantity']:,.0f}",
-            f"{row['dividend_per_share']:.2f}",
-            row['currency'],
-            f"{row['annual_estimate']:,.0f}",
-            f"{row['annual_estimate_local']:,.0f}",
-            f"[{source_style}]{row['source']}[/{source_style}]"
-        )
+    source_style = df['source'].map(lambda src: "green" if src == 'yahoo' else "yellow")
+    _add_rows(
+        table,
+        _fmt_text(df['symbol']),
+        _fmt_total(df['quantity']),
+        df['dividend_per_share'].map('{:.2f}'.format).tolist(),
+        _fmt_text(df['currency']),
+        _fmt_total(df['annual_estimate']),
+        _fmt_total(df['annual_estimate_local']),
+        ("[" + source_style + "]" + df['source'] + "[/" + source_style + "]").tolist(),
+    )
 
     console.print(table)
 
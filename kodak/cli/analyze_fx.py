@@ -1,6 +1,6 @@
-from kodak.shared.db import get_connection
+from kodak.shared.db import get_read_connection
 from kodak.shared.calculations import get_fx_performance
-from kodak.shared.market_data import get_exchange_rate, get_latest_prices
+from kodak.shared.market_data import get_exchange_rates_batch, get_latest_prices
 from kodak.shared.utils import load_config
 import pandas as pd
 
@@ -18,7 +18,7 @@ def run_fx_analysis():
 
     # Add Unrealized FX on Holdings
     # 1. Get current holdings
-    conn = get_connection()
+    conn = get_read_connection()
     df_h = pd.read_sql("SELECT instrument_id, quantity, cost_basis_local FROM (SELECT instrument_id, SUM(quantity) as quantity, SUM(cost_basis_local) as cost_basis_local FROM (SELECT instrument_id, CASE WHEN type IN ('BUY', 'DEPOSIT', 'TRANSFER_IN') THEN quantity ELSE -quantity END as quantity, CASE WHEN type IN ('BUY', 'DEPOSIT', 'TRANSFER_IN') THEN amount_local ELSE -amount_local END as cost_basis_local FROM transactions WHERE instrument_id IS NOT NULL) GROUP BY instrument_id) WHERE quantity > 0.001", conn)
     
     # Enrich with Currency
@@ -31,35 +31,20 @@ def run_fx_analysis():
     # Get Market Value
     prices = get_latest_prices(df_h['instrument_id'].tolist())
     
-    unrealized_data = []
-    for _, row in df_h.iterrows():
-        inst_id = row['instrument_id']
-        curr = row['currency']
-        cost = row['cost_basis_local'] # Wait, this logic in query above is simplified/wrong for avg cost.
-        # But for FX analysis we just want total value exposure.
-        
-        # Proper way: Use get_holdings() from calculations.py?
-        # But we are here.
-        
-        if inst_id in prices:
-            price, _ = prices[inst_id]
-            rate = get_exchange_rate(curr, BASE_CURRENCY)
-            mkt_val = row['quantity'] * price * rate
-            
-            # FX Component of Unrealized?
-            # Total Unrealized = Market Value - Cost Basis
-            # FX Component = (Current Rate - Avg Rate) * Cost in Foreign?
-            # Simplified: Just show total unrealized on foreign assets as proxy for exposure?
-            # Or just show Market Value.
-            
-            unrealized = mkt_val - cost
-            unrealized_data.append({
-                'currency': curr,
-                'Market Value': mkt_val,
-                'Unrealized P&L': unrealized
-            })
-            
-    df_unrealized = pd.DataFrame(unrealized_data)
+    # Only priced holdings count; one rate lookup per currency, then column math
+    df_h = df_h[df_h['instrument_id'].isin(prices.keys())]
+    rate_map = get_exchange_rates_batch(df_h['currency'].unique().tolist(), BASE_CURRENCY)
+    price = df_h['instrument_id'].map(lambda i: prices[i][0]).to_numpy(dtype=float)
+    rate = df_h['currency'].map(rate_map).to_numpy(dtype=float)
+
+    # cost_basis_local from the query above is a simplified net amount, not avg cost;
+    # for FX analysis we just want total value exposure per currency.
+    # Total Unrealized = Market Value - Cost Basis
+    df_unrealized = pd.DataFrame({
+        'currency': df_h['currency'].to_numpy(),
+        'Market Value': df_h['quantity'].to_numpy(dtype=float) * price * rate,
+    })
+    df_unrealized['Unrealized P&L'] = df_unrealized['Market Value'] - df_h['cost_basis_local'].to_numpy(dtype=float)
     if not df_unrealized.empty:
         print("\nForeign Holdings Exposure:")
         print(df_unrealized.groupby('currency')[['Market Value', 'Unrealized P&L']].sum())
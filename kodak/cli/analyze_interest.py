@@ -17,8 +17,8 @@ def run_interest_report():
     table_yearly.add_column("Year", style="cyan")
     table_yearly.add_column(f"Total Interest ({BASE_CURRENCY})", justify="right")
 
-    for _, row in df_yearly.iterrows():
-        table_yearly.add_row(row['year'], f"{row['total']:,.0f}")
+    for year, total in df_yearly[['year', 'total']].itertuples(index=False, name=None):
+        table_yearly.add_row(year, f"{total:,.0f}")
 
     console.print(table_yearly)
 
@@ -27,8 +27,8 @@ def run_interest_report():
     table_curr.add_column("Currency", style="magenta")
     table_curr.add_column(f"Total ({BASE_CURRENCY})", justify="right")
 
-    for _, row in df_curr.iterrows():
-        table_curr.add_row(row['currency'], f"{row['total']:,.0f}")
+    for curr, total in df_curr[['currency', 'total']].itertuples(index=False, name=None):
+        table_curr.add_row(curr, f"{total:,.0f}")
 
     console.print(table_curr)
 
@@ -39,8 +39,8 @@ def run_interest_report():
     table_top.add_column(f"Amount ({BASE_CURRENCY})", justify="right")
     table_top.add_column("Source", style="dim")
 
-    for _, row in df_top.head(20).iterrows():
-        table_top.add_row(row['date'], row['currency'], f"{row['amount_local']:,.0f}", str(row['source_file']))
+    for date, curr, amount, source in df_top.head(20)[['date', 'currency', 'amount_local', 'source_file']].itertuples(index=False, name=None):
+        table_top.add_row(date, curr, f"{amount:,.0f}", str(source))
 
     console.print(table_top)
 
@@ -29,20 +29,13 @@ def run():
     table.add_column("Total P&L", justify="right", style="bold")
 
     # Add Rows
-    for _, row in df.iterrows():
-        total_style = "green" if row['total_pl'] >= 0 else "red"
-        
-        # Helper to format and style individual cells if needed, 
-        # but here we just format numbers.
-        
+    cols = ['year', 'realized_gl', 'dividends', 'interest', 'fees', 'tax', 'total_pl']
+    for year, *amounts, total in df[cols].itertuples(index=False, name=None):
+        total_style = "green" if total >= 0 else "red"
         table.add_row(
-            row['year'],
-            f"{row['realized_gl']:,.0f}",
-            f"{row['dividends']:,.0f}",
-            f"{row['interest']:,.0f}",
-            f"{row['fees']:,.0f}",
-            f"{row['tax']:,.0f}",
-            f"[{total_style}]{row['total_pl']:,.0f}[/{total_style}]"
+            year,
+            *(f"{a:,.0f}" for a in amounts),
+            f"[{total_style}]{total:,.0f}[/{total_style}]"
         )
 
     console.print(table)
@@ -1,7 +1,6 @@
 import argparse
 import json
-import pandas as pd
-from kodak.shared.db import get_connection, execute_query
+from kodak.shared.db import get_read_connection, execute_query
 from kodak.shared.market_data import get_latest_prices, get_exchange_rate
 from kodak.shared.calculations import get_holdings, get_income_and_costs
 from kodak.shared.utils import load_config
@@ -86,11 +85,9 @@ def get_portfolio_data():
         item['weight_pct'] = (item['market_value'] / total_market_value * 100) if total_market_value > 0 else 0
 
     # Calculate cash balance
-    cash_rows = pd.read_sql("SELECT currency, SUM(amount) as total FROM transactions GROUP BY currency", get_connection())
+    cash_rows = get_read_connection().execute("SELECT currency, SUM(amount) as total FROM transactions GROUP BY currency").fetchall()
     cash_balance_nok = 0.0
-    for _, row in cash_rows.iterrows():
-        curr = row['currency']
-        amt = row['total']
+    for curr, amt in cash_rows:
         if curr == BASE_CURRENCY:
             cash_balance_nok += amt
         else:
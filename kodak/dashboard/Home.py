@@ -1,9 +1,4 @@
-import sys
-from pathlib import Path
-# Add project root to sys.path
-root_path = str(Path(__file__).resolve().parent.parent.parent)
-if root_path not in sys.path:
-    sys.path.append(root_path)
+import _bootstrap  # noqa: F401  (adds project root to sys.path)
 
 import streamlit as st
 import pandas as pd
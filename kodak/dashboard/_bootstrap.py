@@ -0,0 +1,13 @@
+"""
+Puts the project root on sys.path once per Streamlit process.
+
+Streamlit adds the main script's folder (kodak/dashboard) to sys.path, so
+Home.py and every page can `import _bootstrap` before importing from kodak.
+The module body only runs on first import.
+"""
+import sys
+from pathlib import Path
+
+root_path = str(Path(__file__).resolve().parent.parent.parent)
+if root_path not in sys.path:
+    sys.path.append(root_path)
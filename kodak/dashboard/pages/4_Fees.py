@@ -1,9 +1,4 @@
-import sys
-from pathlib import Path
-# Add project root to sys.path
-root_path = str(Path(__file__).resolve().parent.parent.parent.parent)
-if root_path not in sys.path:
-    sys.path.append(root_path)
+import _bootstrap  # noqa: F401  (adds project root to sys.path)
 
 import streamlit as st
 import pandas as pd
@@ -18,7 +13,7 @@ st.set_page_config(page_title="Fee Analysis", page_icon="💸", layout="wide")
 
 st.title("💸 Fee Analysis")
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource(ttl=300)  # Cache for 5 minutes
 def load_fee_data():
     return get_fee_details()
 
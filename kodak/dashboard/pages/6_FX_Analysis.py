@@ -1,9 +1,4 @@
-import sys
-from pathlib import Path
-# Add project root to sys.path
-root_path = str(Path(__file__).resolve().parent.parent.parent.parent)
-if root_path not in sys.path:
-    sys.path.append(root_path)
+import _bootstrap  # noqa: F401  (adds project root to sys.path)
 
 import streamlit as st
 import pandas as pd
@@ -18,42 +13,45 @@ st.set_page_config(page_title="FX Analysis", page_icon="💱", layout="wide")
 
 st.title("💱 Currency Performance")
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource(ttl=300)  # Cache for 5 minutes
 def load_fx_data():
-    return get_fx_performance_detailed()
+    df = get_fx_performance_detailed()
+    # Summary totals are computed once per cache fill, not on every rerun
+    totals = {
+        'realized': df['total_realized_pl'].sum() if not df.empty else 0.0,
+        'unrealized': df['total_unrealized_pl'].sum() if not df.empty else 0.0,
+    }
 
-df = load_fx_data()
+    # Table frame with the combined FX total, built once per cache fill
+    display_df = pd.DataFrame()
+    if not df.empty:
+        display_df = df[[
+            'currency',
+            'realized_cash_pl',
+            'realized_securities_pl',
+            'total_realized_pl',
+            'unrealized_securities_pl',
+            'total_unrealized_pl'
+        ]].copy()
+        display_df['total_fx_pl'] = display_df['total_realized_pl'] + display_df['total_unrealized_pl']
+    return df, totals, display_df
+
+df, totals, display_df = load_fx_data()
 
 if df.empty:
     st.info("No foreign currency exposure found.")
 else:
     # Summary Metrics
-    total_realized = df['total_realized_pl'].sum()
-    total_unrealized = df['total_unrealized_pl'].sum()
-
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Realized FX P&L", format_local(total_realized))
-    col2.metric("Total Unrealized FX P&L", format_local(total_unrealized))
-    col3.metric("Total FX P&L", format_local(total_realized + total_unrealized))
+    col1.metric("Total Realized FX P&L", format_local(totals['realized']))
+    col2.metric("Total Unrealized FX P&L", format_local(totals['unrealized']))
+    col3.metric("Total FX P&L", format_local(totals['realized'] + totals['unrealized']))
 
     st.divider()
 
     # Detailed breakdown
     st.subheader("FX P&L by Currency")
 
-    # Create display dataframe with better column names
-    display_df = df[[
-        'currency',
-        'realized_cash_pl',
-        'realized_securities_pl',
-        'total_realized_pl',
-        'unrealized_securities_pl',
-        'total_unrealized_pl'
-    ]].copy()
-
-    # Add total column
-    display_df['total_fx_pl'] = display_df['total_realized_pl'] + display_df['total_unrealized_pl']
-
     st.dataframe(
         display_df,
         column_config={
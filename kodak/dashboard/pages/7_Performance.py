@@ -1,5 +1,6 @@
+import _bootstrap  # noqa: F401  (adds project root to sys.path)
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from kodak.shared.calculations import get_yearly_equity_curve, get_yearly_contribution, get_total_xirr
@@ -14,29 +15,28 @@ st.set_page_config(page_title="Performance", page_icon="📈", layout="wide")
 st.title("📈 Portfolio Performance")
 
 # --- CACHED DATA LOADERS ---
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_total_xirr():
-    return get_total_xirr()
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_yearly_equity_curve():
-    return get_yearly_equity_curve()
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_yearly_contribution(year: str):
-    return get_yearly_contribution(year)
+@st.cache_resource(ttl=300)  # Cache for 5 minutes
+def load_perf_bundle():
+    # All-time XIRR and the yearly timeline share one cache entry and fill
+    total_xirr = get_total_xirr()
+    df_years, missing_prices = get_yearly_equity_curve()
+    # Newest first for the year picker, computed once per cache fill
+    year_options = df_years['year'].sort_values(ascending=False).tolist() if not df_years.empty else []
+    return total_xirr, df_years, missing_prices, year_options
+
+@st.cache_resource(ttl=300)  # Cache for 5 minutes
+def load_all_contributions(years: tuple):
+    # One cache entry for every year, so switching years never recomputes
+    return {year: get_yearly_contribution(year) for year in years}
 
 # --- 1. All-Time Stats ---
-with st.spinner("Calculating All-Time Performance..."):
-    total_xirr = load_total_xirr()
+with st.spinner("Calculating Performance..."):
+    total_xirr, df_years, missing_prices, year_options = load_perf_bundle()
 
 st.metric("All-Time XIRR (Annualized)", f"{format_local(total_xirr, 2)}%")
 st.divider()
 
 # --- 2. Yearly Timeline ---
-with st.spinner("Fetching Yearly Data..."):
-    df_years, missing_prices = load_yearly_equity_curve()
-
 if not df_years.empty:
     # Chart: Equity Curve (Bar for Equity, Line for Return?)
     # Let's do a Combo Chart: Bars = End Equity, Line = XIRR %
@@ -94,7 +94,7 @@ if not df_years.empty:
 
     if missing_prices:
         with st.expander("⚠️ Missing / Fallback Prices Used"):
-            st.dataframe(pd.DataFrame(missing_prices))
+            st.table(missing_prices)
 
 else:
     st.info("No yearly data available.")
@@ -103,11 +103,11 @@ st.divider()
 
 # --- 3. Detailed Year View ---
 st.subheader("Detailed Analysis by Year")
-selected_year = st.selectbox("Select Year", df_years['year'].sort_values(ascending=False) if not df_years.empty else [])
+selected_year = st.selectbox("Select Year", year_options)
 
 if selected_year:
-    with st.spinner(f"Analyzing {selected_year}..."):
-        df_contrib, year_xirr, missing_prices_year = load_yearly_contribution(selected_year)
+    with st.spinner("Analyzing all years..."):
+        df_contrib, year_xirr, missing_prices_year = load_all_contributions(tuple(year_options))[selected_year]
     
     col1, col2 = st.columns(2)
     col1.metric(f"{selected_year} XIRR", f"{year_xirr:.2f}%")
@@ -115,13 +115,14 @@ if selected_year:
     # Treemap of Contribution
     if not df_contrib.empty:
         # Filter out tiny contributions for cleaner chart
-        df_tree = df_contrib[abs(df_contrib['Contribution %']) > 0.05].copy()
-        df_tree['Positive'] = df_tree['Contribution %'] > 0
+        abs_contrib = df_contrib['Contribution %'].abs()
+        mask = abs_contrib > 0.05
+        df_tree = df_contrib.loc[mask]
         
         fig_tree = px.treemap(
             df_tree,
             path=['Symbol'],
-            values=abs(df_tree['Contribution %']), # Size by magnitude
+            values=abs_contrib[mask], # Size by magnitude
             color='Contribution %',
             color_continuous_scale='RdBu',
             color_continuous_midpoint=0,
@@ -156,4 +157,4 @@ if selected_year:
         if missing_prices_year:
             with st.expander(f"⚠️ Missing / Fallback Prices for {selected_year}"):
                  st.info("ℹ️ **Why is this list longer?**\n\nDetailed analysis requires pricing for both the **Start of Year** (to calculate opening value) and **End of Year**. The Timeline view only checks the End of Year value.")
-                 st.dataframe(pd.DataFrame(missing_prices_year))
+                 st.table(missing_prices_year)
@@ -1,13 +1,8 @@
-import sys
-from pathlib import Path
-# Add project root to sys.path
-root_path = str(Path(__file__).resolve().parent.parent.parent.parent)
-if root_path not in sys.path:
-    sys.path.append(root_path)
+import _bootstrap  # noqa: F401  (adds project root to sys.path)
 
 import streamlit as st
 import pandas as pd
-from kodak.shared.db import get_connection
+from kodak.shared.db import get_read_connection
 from kodak.shared.utils import load_config
 
 # --- CONFIGURATION ---
@@ -22,12 +17,13 @@ st.title("⚙️ System Status")
 st.subheader("Configuration")
 st.info(f"**Base Currency:** {BASE_CURRENCY}")
 
+# This session thread's long-lived read-only connection, reused across reruns
+conn = get_read_connection()
+
 # --- 2. Data Freshness ---
 st.subheader("Data Source Status")
 
 def get_data_freshness():
-    conn = get_connection()
-    
     # Check Transactions table
     query = """
         SELECT 
@@ -38,9 +34,7 @@ def get_data_freshness():
         GROUP BY source_file
         ORDER BY MAX(date) DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return pd.read_sql_query(query, conn)
 
 df_freshness = get_data_freshness()
 
@@ -60,24 +54,22 @@ else:
 
 # --- 3. Database Info (Optional) ---
 with st.expander("Database Statistics"):
-    conn = get_connection()
     try:
-        tables = pd.read_sql_query("SELECT name FROM sqlite_master WHERE type='table';", conn)
-        st.write("Tables in database:", tables['name'].tolist())
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall()]
+        st.write("Tables in database:", tables)
         
         # Row counts
         stats = []
-        for table in tables['name']:
-            count = pd.read_sql_query(f"SELECT COUNT(*) as c FROM {table}", conn).iloc[0]['c']
-            stats.append({'Table': table, 'Rows': count})
+        for table in tables:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            stats.append((table, count))
         
-        st.dataframe(pd.DataFrame(stats), hide_index=True)
+        st.dataframe(pd.DataFrame.from_records(stats, columns=['Table', 'Rows']).astype({'Rows': 'int64'}), hide_index=True)
         
     except Exception as e:
         st.error(f"Error fetching stats: {e}")
-    finally:
-        conn.close()
 
 if st.button("Refresh System & Clear Cache"):
     st.cache_data.clear()
+    st.cache_resource.clear()
     st.rerun()
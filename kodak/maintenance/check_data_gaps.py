@@ -1,16 +1,23 @@
 import pandas as pd
 from kodak.shared.db import get_connection
-from kodak.shared.calculations import get_holdings
+from kodak.shared.calculations import get_holdings_qty_only
 
 def check_gaps():
     conn = get_connection()
-    holdings = get_holdings()
+    holdings = get_holdings_qty_only()
     
     # 1. Check for holdings without any price in market_prices
-    query_prices = "SELECT DISTINCT instrument_id FROM market_prices"
-    priced_ids = pd.read_sql_query(query_prices, conn)['instrument_id'].tolist()
+    query_unpriced = """
+        SELECT i.id as instrument_id
+        FROM instruments i
+        LEFT JOIN market_prices mp ON mp.instrument_id = i.id
+        WHERE mp.instrument_id IS NULL
+    """
+    unpriced_ids = pd.DataFrame.from_records(
+        conn.execute(query_unpriced).fetchall(), columns=['instrument_id']
+    ).astype({'instrument_id': 'int64'})
     
-    unpriced = holdings[~holdings['instrument_id'].isin(priced_ids)]
+    unpriced = holdings.merge(unpriced_ids, on='instrument_id')
     
     print("--- Holdings Missing Market Prices ---")
     if not unpriced.empty:
@@ -21,7 +28,9 @@ def check_gaps():
     # 2. Check for instruments missing symbols (often meaning ISIN map failed)
     print("\n--- Instruments Missing Symbols (Ticker) ---")
     query_missing_sym = "SELECT id, isin, name, currency FROM instruments WHERE symbol IS NULL OR symbol = ''"
-    missing_sym = pd.read_sql_query(query_missing_sym, conn)
+    missing_sym = pd.DataFrame.from_records(
+        conn.execute(query_missing_sym).fetchall(), columns=['id', 'isin', 'name', 'currency']
+    )
     
     if not missing_sym.empty:
         print(missing_sym)
@@ -36,7 +45,9 @@ def check_gaps():
         LEFT JOIN transactions t ON i.id = t.instrument_id
         WHERE t.id IS NULL
     """
-    unused = pd.read_sql_query(query_unused, conn)
+    unused = pd.DataFrame.from_records(
+        conn.execute(query_unused).fetchall(), columns=['id', 'isin', 'name']
+    )
     if not unused.empty:
         print(unused)
     else:
@@ -44,19 +55,17 @@ def check_gaps():
 
     # 4. Check for Stale Prices (Older than 3 days)
     print("\n--- Stale Prices (> 3 days old) for Current Holdings ---")
-    query_latest_price = """
+    symbols = holdings['symbol'].dropna().unique().tolist()
+    placeholders = ','.join('?' * len(symbols))
+    query_stale = f"""
         SELECT i.symbol, i.isin, MAX(mp.date) as last_price_date
         FROM market_prices mp
         JOIN instruments i ON mp.instrument_id = i.id
+        WHERE i.symbol IN ({placeholders})
         GROUP BY mp.instrument_id
+        HAVING last_price_date < date('now', '-3 day')
     """
-    latest_prices = pd.read_sql_query(query_latest_price, conn)
-    
-    # Filter for holdings
-    current_holding_ids = holdings['instrument_id'].unique()
-    
-    stale_mask = pd.to_datetime(latest_prices['last_price_date']) < (pd.Timestamp.now() - pd.Timedelta(days=3))
-    stale_prices = latest_prices[stale_mask & latest_prices['symbol'].isin(holdings['symbol'])]
+    stale_prices = pd.read_sql_query(query_stale, conn, params=symbols, parse_dates=['last_price_date'])
     
     if not stale_prices.empty:
         print(stale_prices)
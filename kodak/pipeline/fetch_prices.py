@@ -21,7 +21,7 @@ def update_prices():
         return
 
     # 2. Fetch
-    prices = get_latest_prices(inst_ids)
+    prices = get_latest_prices(inst_ids, refresh=True)
 
     # 3. Store
     store_prices(prices)
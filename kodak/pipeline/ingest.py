@@ -1,15 +1,124 @@
 import os
 import glob
-import pandas as pd
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from kodak.shared.utils import setup_logging, generate_txn_hash
-from kodak.shared.db import get_connection, execute_non_query, execute_query
+from kodak.shared.db import get_connection, execute_non_query
 import importlib
 
 RAW_PATH = os.path.join('data', 'new_raw_transactions')
 ARCHIVE_PATH = os.path.join(RAW_PATH, 'archive')
 
+# Columns of transactions_staging, in table order
+STAGING_COLS = [
+    'external_id', 'account_external_id', 'isin', 'symbol', 'date', 'type',
+    'quantity', 'price', 'amount', 'currency', 'amount_local', 'exchange_rate',
+    'fee', 'fee_currency', 'fee_local', 'description', 'source_file', 'hash', 'batch_id'
+]
+
+# Staged rows whose (date, account, type, isin, amount) already exist in transactions.
+# Amounts compare at 2 decimals like generate_txn_hash; amount_local only when non-zero.
+DEDUP_EXISTING_SQL = '''
+    DELETE FROM transactions_staging AS s
+    WHERE s.batch_id = ?
+      AND EXISTS (
+        SELECT 1
+        FROM accounts a
+        JOIN transactions t ON t.account_id = a.id
+        LEFT JOIN instruments i ON t.instrument_id = i.id
+        WHERE a.external_id = s.account_external_id
+          AND t.date >= substr(s.date, 1, 10) AND t.date < date(substr(s.date, 1, 10), '+1 day')
+          AND t.type = s.type
+          AND IFNULL(i.isin, '') = IFNULL(s.isin, '')
+          AND (ROUND(s.amount, 2) IN (ROUND(t.amount, 2), ROUND(NULLIF(t.amount_local, 0), 2))
+               OR ROUND(NULLIF(s.amount_local, 0), 2) IN (ROUND(t.amount, 2), ROUND(NULLIF(t.amount_local, 0), 2)))
+      )
+'''
+
+# Later copies of the same hash within one batch (first parsed row wins)
+DEDUP_BATCH_SQL = '''
+    DELETE FROM transactions_staging
+    WHERE batch_id = ?
+      AND rowid NOT IN (SELECT MIN(rowid) FROM transactions_staging WHERE batch_id = ? GROUP BY hash)
+'''
+
+def _init_worker_logging(queue, level):
+    """Sends a parser worker's log records to the parent, which writes them to the ingest log."""
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(queue)]
+    root.setLevel(level)
+
+def _parse_files(jobs):
+    """
+    Runs each job's parser on its file and returns the results in job order.
+
+    Parsing is CPU-bound (Excel/CSV decoding), so several files are spread over
+    worker processes. A failed parse returns its exception in place of the rows.
+    """
+    if len(jobs) <= 1:
+        results = []
+        for parser_func, f, _ in jobs:
+            try:
+                results.append(parser_func(f))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # Spawned workers start without setup_logging(); route their records through the parent's handlers
+    root = logging.getLogger()
+    log_queue = multiprocessing.Queue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    listener.start()
+
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1),
+                                 initializer=_init_worker_logging, initargs=(log_queue, root.level)) as pool:
+            futures = [pool.submit(parser_func, f) for parser_func, f, _ in jobs]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+    finally:
+        listener.stop()
+    return results
+
+def _archive_files(processed_files, batch_id):
+    """Moves parsed files into archive/<source>/, one directory setup per source."""
+    by_source = {}
+    for f_path, source_name in processed_files:
+        by_source.setdefault(source_name, []).append(f_path)
+
+    for source_name, paths in by_source.items():
+        # Create archive/nordnet/ etc.
+        dest_dir = os.path.join(ARCHIVE_PATH, source_name)
+        os.makedirs(dest_dir, exist_ok=True)
+        existing = set(os.listdir(dest_dir))
+
+        for f_path in paths:
+            name = os.path.basename(f_path)
+
+            # Handle duplicates in archive by appending timestamp if needed
+            if name in existing:
+                base, ext = os.path.splitext(name)
+                name = f"{base}_{batch_id}{ext}"
+
+            os.replace(f_path, os.path.join(dest_dir, name))
+            existing.add(name)
+            logging.info(f"Archived {os.path.basename(f_path)} to {source_name}/")
+
+        # Persist the renames with a single directory sync
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(dest_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
 def run_ingestion():
     log_file = setup_logging("ingest_new")
     logging.info(f"Starting ingestion process. Log file: {log_file}")
@@ -29,6 +138,7 @@ def run_ingestion():
     logging.info(f"Generated Batch ID: {batch_id}")
 
     all_rows = []
+    jobs = [] # Tuples of (parser_func, full_path, source_name)
     processed_files = [] # Tuples of (full_path, source_name)
 
     # 2. Iterate Sources
@@ -60,77 +170,29 @@ def run_ingestion():
         
         for f in files:
             logging.info(f"Parsing {os.path.basename(f)} using {source_name} parser...")
-            try:
-                rows = parser_func(f)
-                all_rows.extend(rows)
-                processed_files.append((f, source_name))
-            except Exception as e:
-                logging.error(f"Failed to parse {f}: {e}")
+            jobs.append((parser_func, f, source_name))
+
+    # Parse every file (in parallel when there are several); results keep job order
+    for (_, f, source_name), result in zip(jobs, _parse_files(jobs)):
+        if isinstance(result, Exception):
+            logging.error(f"Failed to parse {f}: {result}")
+            continue
+        all_rows.extend(result)
+        processed_files.append((f, source_name))
 
     if not all_rows:
         logging.info("No rows extracted from any files.")
         conn.close()
         return
 
-    # 3. Load Existing Hashes (Deduplication)
+    # 3. Hash & Tag
     # Use ISIN instead of symbol for consistent matching (parser uses security name, DB uses ticker)
-    # Generate hashes with BOTH amount and amount_local to handle data inconsistencies
-    existing_txns = execute_query('''
-        SELECT t.date, a.external_id as acc_ext, t.type, i.isin, t.amount, t.amount_local
-        FROM transactions t
-        JOIN accounts a ON t.account_id = a.id
-        LEFT JOIN instruments i ON t.instrument_id = i.id
-    ''')
-
-    existing_hashes = set()
-    for row in existing_txns:
-        isin = row['isin'] if row['isin'] else ''
-        amt = row['amount']
-        amt_local = row['amount_local']
-        # Add hash with amount (for foreign dividends where parser lacks FX rate)
-        h1 = generate_txn_hash(row['date'], row['acc_ext'], row['type'], isin, amt)
-        existing_hashes.add(h1)
-        # Add hash with amount_local only if non-zero (avoids false matches)
-        if amt_local:
-            h2 = generate_txn_hash(row['date'], row['acc_ext'], row['type'], isin, amt_local)
-            existing_hashes.add(h2)
-
-    # 4. Filter & Stage
-    to_stage = []
-    skipped_existing = 0
-    skipped_batch = 0
-    batch_hashes = set()
-
     for item in all_rows:
         isin = item['isin'] if item['isin'] else ''
-        amt = item['amount']
-        amt_local = item['amount_local']
-
-        # Check both amount and amount_local hashes against existing DB records
-        h1 = generate_txn_hash(item['date'], item['account_external_id'], item['type'], isin, amt)
-        h2 = generate_txn_hash(item['date'], item['account_external_id'], item['type'], isin, amt_local) if amt_local else None
-
-        if h1 in existing_hashes or (h2 and h2 in existing_hashes):
-            skipped_existing += 1
-            continue
-
-        # For batch deduplication, only use amount hash (amount_local=0 causes false positives)
-        if h1 in batch_hashes:
-            skipped_batch += 1
-            continue
-
-        batch_hashes.add(h1)
-
-        item['hash'] = h1
+        item['hash'] = generate_txn_hash(item['date'], item['account_external_id'], item['type'], isin, item['amount'])
         item['batch_id'] = batch_id
-        to_stage.append(item)
 
-    logging.info(f"Staging {len(to_stage)} transactions (Skipped {skipped_existing} existing, {skipped_batch} batch duplicates).")
-    
-    if not to_stage:
-        return
-
-    # 5. Write to Staging Table
+    # 4. Write to Staging Table
     # We use a Denormalized Staging Table
     execute_non_query('''
         CREATE TABLE IF NOT EXISTS transactions_staging (
@@ -155,34 +217,39 @@ def run_ingestion():
             batch_id TEXT
         )
     ''')
+    # Dedup below filters by batch and groups by hash
+    execute_non_query("CREATE INDEX IF NOT EXISTS idx_stg_batch_hash ON transactions_staging(batch_id, hash)")
+
+    # Insert straight from the parsed dicts; no intermediate DataFrame copy of the batch
+    rows = [[d.get(c) for c in STAGING_COLS] for d in all_rows]
+    del all_rows
 
-    # Insert
-    # We can use pandas to_sql for convenience with the list of dicts
-    df_stage = pd.DataFrame(to_stage)
-    
-    # Ensure all columns match
     # Convert datetime objects to string
-    df_stage['date'] = df_stage['date'].astype(str)
-    
+    date_idx = STAGING_COLS.index('date')
+    for r in rows:
+        r[date_idx] = str(r[date_idx])
+
+    placeholders = ", ".join("?" * len(STAGING_COLS))
     try:
-        df_stage.to_sql('transactions_staging', conn, if_exists='append', index=False)
+        conn.executemany(f"INSERT INTO transactions_staging ({', '.join(STAGING_COLS)}) VALUES ({placeholders})", rows)
+
+        # 5. Deduplicate in SQL
+        # Drop rows already in the ledger. Match on the same key as the hash, trying
+        # BOTH amount and amount_local to handle data inconsistencies (e.g. foreign
+        # dividends where the parser lacks an FX rate)
+        skipped_existing = conn.execute(DEDUP_EXISTING_SQL, (batch_id,)).rowcount
+        # For batch deduplication, only use amount hash (amount_local=0 causes false positives)
+        skipped_batch = conn.execute(DEDUP_BATCH_SQL, (batch_id, batch_id)).rowcount
+        conn.commit()
+
+        staged = conn.execute("SELECT COUNT(*) FROM transactions_staging WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+        logging.info(f"Staging {staged} transactions (Skipped {skipped_existing} existing, {skipped_batch} batch duplicates).")
+        if not staged:
+            return
         logging.info("Data pushed to staging.")
-        
+
         # 6. Archive Files
-        for f_path, source_name in processed_files:
-            # Create archive/nordnet/ etc.
-            dest_dir = os.path.join(ARCHIVE_PATH, source_name)
-            os.makedirs(dest_dir, exist_ok=True)
-            
-            dest = os.path.join(dest_dir, os.path.basename(f_path))
-            
-            # Handle duplicates in archive by appending timestamp if needed
-            if os.path.exists(dest):
-                base, ext = os.path.splitext(os.path.basename(f_path))
-                dest = os.path.join(dest_dir, f"{base}_{batch_id}{ext}")
-            
-            os.replace(f_path, dest)
-            logging.info(f"Archived {os.path.basename(f_path)} to {source_name}/")
+        _archive_files(processed_files, batch_id)
             
     except Exception as e:
         logging.error(f"Error writing to staging: {e}")
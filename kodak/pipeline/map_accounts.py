@@ -19,22 +19,17 @@ def map_accounts():
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        updates = 0
-        for _, row in df_map.iterrows():
-            ext_id = str(row['external_id'])
-            name = row['name']
-            broker = row.get('broker')
-            acc_type = row.get('type')
-
-            # Update account
-            cursor.execute("""
-                UPDATE accounts
-                SET name = ?, broker = ?, type = ?
-                WHERE external_id = ?
-            """, (name, broker, acc_type, ext_id))
-
-            if cursor.rowcount > 0:
-                updates += cursor.rowcount
+        # Optional columns missing from the CSV update to NULL
+        cols = df_map.reindex(columns=['name', 'broker', 'type'])
+        params = zip(cols['name'], cols['broker'], cols['type'], df_map['external_id'].astype(str))
+
+        # Update accounts (one prepared statement for every row; rowcount sums over them)
+        cursor.executemany("""
+            UPDATE accounts
+            SET name = ?, broker = ?, type = ?
+            WHERE external_id = ?
+        """, params)
+        updates = max(cursor.rowcount, 0)
 
         conn.commit()
     logger.info(f"Updated {updates} accounts based on accounts_map.csv.")
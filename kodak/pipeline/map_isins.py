@@ -19,30 +19,22 @@ def map_isins():
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        updates = 0
-        for _, row in df_map.iterrows():
-            isin = row['isin']
-            symbol = row['symbol']
-            currency = row['currency']
-            sector = row.get('sector')
-            region = row.get('region')
-            country = row.get('country')
-            asset_class = row.get('asset_class')
-
-            # Update instrument
-            cursor.execute("""
-                UPDATE instruments
-                SET symbol = ?,
-                    currency = ?,
-                    sector = ?,
-                    region = ?,
-                    country = ?,
-                    asset_class = ?
-                WHERE isin = ?
-            """, (symbol, currency, sector, region, country, asset_class, isin))
-
-            if cursor.rowcount > 0:
-                updates += cursor.rowcount
+        # Optional columns missing from the CSV update to NULL
+        cols = df_map.reindex(columns=['symbol', 'currency', 'sector', 'region', 'country', 'asset_class', 'isin'])
+        params = cols.itertuples(index=False, name=None)
+
+        # Update instruments (one prepared statement for every row; rowcount sums over them)
+        cursor.executemany("""
+            UPDATE instruments
+            SET symbol = ?,
+                currency = ?,
+                sector = ?,
+                region = ?,
+                country = ?,
+                asset_class = ?
+            WHERE isin = ?
+        """, params)
+        updates = max(cursor.rowcount, 0)
 
         conn.commit()
     logger.info(f"Updated {updates} instruments based on ISIN map.")
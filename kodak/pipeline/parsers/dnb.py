@@ -3,9 +3,10 @@ import os
 import uuid
 from typing import List, Dict, Any
 
+import numpy as np
 import pandas as pd
 
-from kodak.shared.utils import clean_num, load_config
+from kodak.shared.utils import clean_num_series, load_config
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +20,22 @@ DNB_ACCOUNT_ID = '9017671'
 # Ticker, Navn, Handelsdato, Handelsretning, Antall, Pris, Totalbeløp, MIC, Valuta,
 # Valutakurs, Transaksjons ID, Oppgjørsdato, Totalbeløp (lokal valuta), Transaksjonsgebyr
 
+# Only the columns the parser uses, by position: Ticker, Handelsdato, Handelsretning,
+# Antall, Pris, Valuta, Valutakurs, Transaksjonsgebyr (in NOK)
+USE_COLS = [0, 2, 3, 4, 5, 8, 9, 13]
+COL_NAMES = ['ticker', 'trade_date', 'direction', 'quantity', 'price', 'currency', 'exchange_rate', 'fee']
+
+# Output columns that repeat a handful of values across all records
+SHARED_VALUE_COLS = ['account_external_id', 'isin', 'symbol', 'type', 'currency', 'source_file', 'fee_currency']
+
 def parse(file_path: str) -> List[Dict[str, Any]]:
     """Parse DNB ASK Excel export."""
     try:
         # Skip first 5 rows (metadata), row 5 is header
-        df = pd.read_excel(file_path, skiprows=5)
+        df = pd.read_excel(
+            file_path, skiprows=5, usecols=USE_COLS, names=COL_NAMES,
+            dtype={'ticker': str, 'direction': str, 'currency': str}
+        )
     except Exception as e:
         logger.error(f'Error reading DNB file {file_path}: {e}')
         return []
@@ -32,98 +44,100 @@ def parse(file_path: str) -> List[Dict[str, Any]]:
         logger.warning(f'No data found in {file_path}')
         return []
 
-    results = []
-    pre_split_shares = 0  # Track pre-split shares for BYTTE generation
     split_date = '2025-06-19'  # AENA 10:1 split date
-
-    for _, row in df.iterrows():
-        ticker = str(row.iloc[0]).strip()  # Ticker column
-
-        # Skip empty rows
-        if pd.isna(row.iloc[0]) or ticker == 'nan':
-            continue
-
-        trade_date = str(row.iloc[2])[:10]  # Handelsdato (trade date)
-        direction = str(row.iloc[3]).upper()  # Handelsretning (Kjøpt = Buy)
-        quantity = clean_num(row.iloc[4])  # Antall
-        price = clean_num(row.iloc[5])  # Pris
-        currency = str(row.iloc[8]).strip()  # Valuta
-        exchange_rate = clean_num(row.iloc[9])  # Valutakurs
-        fee_nok = clean_num(row.iloc[13])  # Transaksjonsgebyr (in NOK)
-
-        # Map direction to type
-        if 'KJØP' in direction or 'KJØ' in direction:
-            txn_type = 'BUY'
-        elif 'SALG' in direction or 'SOLGT' in direction:
-            txn_type = 'SELL'
-        else:
-            txn_type = 'OTHER'
-            logger.warning(f'Unknown direction: {direction}')
-
-        # Normalize ticker - both AENA and AENA_OLD map to AENA.MC
-        symbol = 'AENA.MC' if 'AENA' in ticker.upper() else ticker
-        isin = 'ES0105046017' if symbol == 'AENA.MC' else None
-
-        # Track pre-split shares
-        is_pre_split = 'OLD' in ticker.upper() or (trade_date < split_date and 'AENA' in ticker.upper())
-        if is_pre_split and txn_type == 'BUY':
-            pre_split_shares += quantity
-
-        # Calculate amounts
-        amount = quantity * price  # In trading currency
-        amount_local = amount * exchange_rate  # In NOK
-
-        # Add DEPOSIT transaction (day before buy) - always positive
-        deposit_date = pd.to_datetime(trade_date) - pd.Timedelta(days=1)
-        deposit_amount = abs(amount_local) + fee_nok  # Total including fees
-
-        # Sign convention: BUY = cash outflow (negative), SELL = cash inflow (positive)
-        if txn_type == 'BUY':
-            amount = -abs(amount)
-            amount_local = -abs(amount_local)
-
-        deposit = {
-            'external_id': str(uuid.uuid4()),
-            'account_external_id': DNB_ACCOUNT_ID,
-            'isin': None,
-            'symbol': None,
-            'date': deposit_date.strftime('%Y-%m-%d'),
-            'type': 'DEPOSIT',
-            'quantity': 0,
-            'price': 0,
-            'amount': deposit_amount,
-            'currency': BASE_CURRENCY,
-            'amount_local': deposit_amount,
-            'exchange_rate': 1.0,
-            'description': f'Deposit for {symbol} purchase',
-            'source_file': os.path.basename(file_path),
-            'fee': 0,
-            'fee_currency': BASE_CURRENCY,
-            'fee_local': 0
-        }
-        results.append(deposit)
-
-        # Add BUY transaction
-        buy = {
-            'external_id': str(uuid.uuid4()),
-            'account_external_id': DNB_ACCOUNT_ID,
-            'isin': isin,
-            'symbol': symbol,
-            'date': trade_date,
-            'type': txn_type,
-            'quantity': quantity if txn_type == 'BUY' else -quantity,
-            'price': price,
-            'amount': amount,
-            'currency': currency,
-            'amount_local': amount_local,
-            'exchange_rate': exchange_rate,
-            'description': f'{ticker} {"pre-split" if is_pre_split else "post-split"} purchase',
-            'source_file': os.path.basename(file_path),
-            'fee': fee_nok,
-            'fee_currency': BASE_CURRENCY,
-            'fee_local': fee_nok
-        }
-        results.append(buy)
+    source_file = os.path.basename(file_path)
+
+    # Skip empty rows
+    ticker = df['ticker'].astype(str).str.strip()
+    keep = df['ticker'].notna() & (ticker != 'nan')
+    df, ticker = df[keep], ticker[keep]
+
+    trade_date = df['trade_date'].astype(str).str[:10]
+    direction = df['direction'].astype(str).str.upper()  # Kjøpt = Buy
+    quantity = clean_num_series(df['quantity'])
+    price = clean_num_series(df['price'])
+    currency = df['currency'].astype(str).str.strip()
+    exchange_rate = clean_num_series(df['exchange_rate'])
+    fee_nok = clean_num_series(df['fee'])
+
+    # Map direction to type
+    is_buy = direction.str.contains('KJØ', regex=False)
+    is_sell = ~is_buy & direction.str.contains('SALG|SOLGT')
+    txn_type = pd.Series(np.select([is_buy, is_sell], ['BUY', 'SELL'], default='OTHER'), index=df.index)
+    for unknown in direction[~is_buy & ~is_sell].unique():
+        logger.warning(f'Unknown direction: {unknown}')
+
+    # Normalize ticker - both AENA and AENA_OLD map to AENA.MC
+    ticker_upper = ticker.str.upper()
+    is_aena = ticker_upper.str.contains('AENA', regex=False)
+    symbol = ticker.mask(is_aena, 'AENA.MC')
+    isin = pd.Series(np.where(is_aena, 'ES0105046017', None), index=df.index, dtype=object)
+
+    # Track pre-split shares
+    is_pre_split = ticker_upper.str.contains('OLD', regex=False) | ((trade_date < split_date) & is_aena)
+    pre_split_shares = float(quantity[is_pre_split & is_buy].sum())
+
+    # Calculate amounts
+    amount = quantity * price  # In trading currency
+    amount_local = amount * exchange_rate  # In NOK
+
+    # DEPOSIT transaction (day before buy) - always positive
+    deposit_date = (pd.to_datetime(trade_date, format='%Y-%m-%d') - pd.Timedelta(days=1)).dt.strftime('%Y-%m-%d')
+    deposit_amount = amount_local.abs() + fee_nok  # Total including fees
+
+    # Sign convention: BUY = cash outflow (negative), SELL = cash inflow (positive)
+    amount = amount.mask(is_buy, -amount.abs())
+    amount_local = amount_local.mask(is_buy, -amount_local.abs())
+
+    n = len(df)
+    deposits = pd.DataFrame({
+        'external_id': [str(uuid.uuid4()) for _ in range(n)],
+        'account_external_id': DNB_ACCOUNT_ID,
+        'isin': None,
+        'symbol': None,
+        'date': deposit_date,
+        'type': 'DEPOSIT',
+        'quantity': 0,
+        'price': 0,
+        'amount': deposit_amount,
+        'currency': BASE_CURRENCY,
+        'amount_local': deposit_amount,
+        'exchange_rate': 1.0,
+        'description': 'Deposit for ' + symbol + ' purchase',
+        'source_file': source_file,
+        'fee': 0,
+        'fee_currency': BASE_CURRENCY,
+        'fee_local': 0
+    }, index=df.index)
+
+    # BUY transaction
+    buys = pd.DataFrame({
+        'external_id': [str(uuid.uuid4()) for _ in range(n)],
+        'account_external_id': DNB_ACCOUNT_ID,
+        'isin': isin,
+        'symbol': symbol,
+        'date': trade_date,
+        'type': txn_type,
+        'quantity': quantity.where(is_buy, -quantity),
+        'price': price,
+        'amount': amount,
+        'currency': currency,
+        'amount_local': amount_local,
+        'exchange_rate': exchange_rate,
+        'description': ticker + np.where(is_pre_split, ' pre-split', ' post-split') + ' purchase',
+        'source_file': source_file,
+        'fee': fee_nok,
+        'fee_currency': BASE_CURRENCY,
+        'fee_local': fee_nok
+    }, index=df.index)
+
+    # Each deposit directly precedes its buy, as in the source row order
+    combined = pd.concat([deposits, buys]).sort_index(kind='stable')
+    # Low-cardinality text columns go through category so every record shares one
+    # string object per distinct value instead of a copy per row
+    combined[SHARED_VALUE_COLS] = combined[SHARED_VALUE_COLS].astype('category')
+    combined = combined.astype(object)
+    results = combined.where(combined.notna(), None).to_dict('records')
 
     # Generate BYTTE (split) transactions if we have pre-split shares
     if pre_split_shares > 0:
@@ -144,7 +158,7 @@ def parse(file_path: str) -> List[Dict[str, Any]]:
             'amount_local': 0,
             'exchange_rate': 1.0,
             'description': f'AENA 10:1 stock split - {pre_split_shares} shares out',
-            'source_file': os.path.basename(file_path),
+            'source_file': source_file,
             'fee': 0,
             'fee_currency': BASE_CURRENCY,
             'fee_local': 0
@@ -166,7 +180,7 @@ def parse(file_path: str) -> List[Dict[str, Any]]:
             'amount_local': 0,
             'exchange_rate': 1.0,
             'description': f'AENA 10:1 stock split - {post_split_shares} shares in',
-            'source_file': os.path.basename(file_path),
+            'source_file': source_file,
             'fee': 0,
             'fee_currency': BASE_CURRENCY,
             'fee_local': 0
@@ -1,5 +1,6 @@
 import logging
 import os
+import sys
 import uuid
 from typing import List, Dict, Any
 
@@ -15,7 +16,8 @@ BASE_CURRENCY = config.get('base_currency', 'NOK')
 
 def parse(file_path: str) -> List[Dict[str, Any]]:
     try:
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-16')
+        # memory_map: parse straight from the mapped file instead of buffered read copies
+        df = pd.read_csv(file_path, sep='\t', encoding='utf-16', memory_map=True)
     except Exception as e:
         logger.error(f'Error reading Nordnet file {file_path}: {e}')
         return []
@@ -121,9 +123,11 @@ def parse(file_path: str) -> List[Dict[str, Any]]:
             elif exchange_rate != 0:
                 fee_local = fee_raw * exchange_rate
 
+        # Account ids and currency codes repeat on every row; intern them so all
+        # records share one string object per value
         item = {
             'external_id': str(uuid.uuid4()),
-            'account_external_id': str(row['Portefølje']),
+            'account_external_id': sys.intern(str(row['Portefølje'])),
             'isin': str(row['ISIN']) if pd.notna(row['ISIN']) else None,
             'symbol': str(row['Verdipapir']) if pd.notna(row['Verdipapir']) else None,
             'date': row['Handelsdag'],
@@ -131,13 +135,13 @@ def parse(file_path: str) -> List[Dict[str, Any]]:
             'quantity': qty,
             'price': row['Kurs_Clean'],
             'amount': amount,
-            'currency': currency,
+            'currency': sys.intern(str(currency)),
             'amount_local': amount_local,
             'exchange_rate': exchange_rate,
             'description': text,
             'source_file': os.path.basename(file_path),
             'fee': fee_raw,
-            'fee_currency': fee_currency,
+            'fee_currency': sys.intern(str(fee_currency)),
             'fee_local': fee_local
         }
         results.append(item)
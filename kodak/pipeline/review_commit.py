@@ -1,13 +1,37 @@
 import logging
 import os
 import pandas as pd
-from kodak.shared.db import get_connection, execute_non_query, execute_scalar, execute_query, create_backup
+from kodak.shared.db import get_connection, execute_non_query, execute_query, create_backup
 from kodak.shared.utils import load_config
 
 logger = logging.getLogger(__name__)
 
 ACCOUNTS_MAP_PATH = os.path.join('data', 'reference', 'accounts_map.csv')
 
+# Staging review shows this many rows (by date) before asking to commit
+PREVIEW_ROWS = 15
+PREVIEW_COLS = ['date', 'type', 'symbol', 'quantity', 'price', 'amount_local', 'fee_local']
+
+# Moves staging into the ledger in one statement, resolving account/instrument ids by join.
+# Rows whose hash is already in the ledger, and repeat hashes within staging (e.g. the
+# same files ingested twice before a commit), are left out.
+COMMIT_STAGING_SQL = '''
+    INSERT INTO transactions (
+        external_id, account_id, instrument_id, date, type,
+        quantity, price, amount, currency,
+        amount_local, exchange_rate, fee, fee_currency, fee_local, notes, batch_id, source_file, hash
+    )
+    SELECT
+        s.external_id, a.id, i.id, s.date, s.type,
+        s.quantity, s.price, s.amount, s.currency,
+        s.amount_local, s.exchange_rate, s.fee, s.fee_currency, s.fee_local, s.description, s.batch_id, s.source_file, s.hash
+    FROM transactions_staging s
+    JOIN accounts a ON a.external_id = s.account_external_id
+    LEFT JOIN instruments i ON i.isin = s.isin
+    WHERE NOT EXISTS (SELECT 1 FROM transactions t WHERE t.hash = s.hash)
+      AND s.rowid IN (SELECT MIN(rowid) FROM transactions_staging GROUP BY hash)
+    ORDER BY s.rowid
+'''
 
 def _append_placeholder_accounts(unknown_accs):
     """Append placeholder rows to accounts_map.csv for new accounts."""
@@ -38,6 +62,15 @@ def _append_placeholder_accounts(unknown_accs):
         logger.warning(f"Could not update accounts_map.csv: {e}")
 
 
+def _existing_keys(table, column, values):
+    """Return the subset of values already present in table.column."""
+    if not values:
+        return set()
+    placeholders = ", ".join("?" * len(values))
+    rows = execute_query(f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", tuple(values))
+    return {row[0] for row in rows}
+
+
 def review_and_commit():
     conn = get_connection()
     config = load_config()
@@ -45,49 +78,42 @@ def review_and_commit():
     
     # Check Staging
     try:
-        df = pd.read_sql("SELECT * FROM transactions_staging", conn)
+        total = conn.execute("SELECT COUNT(*) FROM transactions_staging").fetchone()[0]
     except Exception as e:
         logger.info(f"Staging table does not exist or is empty: {e}")
         print("Staging table does not exist or is empty.")
         conn.close()
         return
 
-    if df.empty:
+    if not total:
         print("No transactions in staging.")
         conn.close()
         return
 
-    print(f"\n--- REVIEW STAGING ({len(df)} transactions) ---")
+    print(f"\n--- REVIEW STAGING ({total} transactions) ---")
 
-    # Sort by date and show more useful columns
-    display_df = df.sort_values('date').copy()
-    display_cols = ['date', 'type', 'symbol', 'quantity', 'price', 'amount_local', 'fee_local']
-    display_cols = [c for c in display_cols if c in display_df.columns]
+    # Sort by date and show more useful columns (only the preview rows are loaded)
+    display_df = pd.read_sql(
+        f"SELECT {', '.join(PREVIEW_COLS)} FROM transactions_staging ORDER BY date, rowid LIMIT {PREVIEW_ROWS}", conn
+    )
 
     # Format numeric columns for readability
     pd.set_option('display.float_format', lambda x: f'{x:,.2f}' if abs(x) >= 0.01 else f'{x:.4f}')
-    print(display_df[display_cols].head(15).to_string(index=False))
-    if len(df) > 15:
-        print(f"... and {len(df)-15} more.")
+    print(display_df.to_string(index=False))
+    if total > PREVIEW_ROWS:
+        print(f"... and {total-PREVIEW_ROWS} more.")
 
-    # Check for New Accounts/Instruments
-    staged_accs = df['account_external_id'].unique()
-    staged_isins = df['isin'].unique()
-    
-    # Find unknown accounts
-    unknown_accs = []
-    for acc in staged_accs:
-        exists = execute_scalar("SELECT 1 FROM accounts WHERE external_id = ?", (acc,))
-        if not exists:
-            unknown_accs.append(acc)
-            
-    # Find unknown instruments
-    unknown_insts = []
-    for isin in staged_isins:
-        if not isin: continue
-        exists = execute_scalar("SELECT 1 FROM instruments WHERE isin = ?", (isin,))
-        if not exists:
-            unknown_insts.append(isin)
+    # Check for New Accounts/Instruments (one IN (...) lookup per table)
+    staged_accs = [row[0] for row in conn.execute("SELECT DISTINCT account_external_id FROM transactions_staging")]
+    staged_isins = [row[0] for row in conn.execute(
+        "SELECT DISTINCT isin FROM transactions_staging WHERE isin IS NOT NULL AND isin != ''"
+    )]
+
+    known_accs = _existing_keys('accounts', 'external_id', staged_accs)
+    unknown_accs = [acc for acc in staged_accs if acc not in known_accs]
+
+    known_isins = _existing_keys('instruments', 'isin', staged_isins)
+    unknown_insts = [isin for isin in staged_isins if isin not in known_isins]
 
     if unknown_accs:
         print(f"\n[!] WARNING: {len(unknown_accs)} New Accounts detected:")
@@ -105,18 +131,21 @@ def review_and_commit():
         print("Staging cleared.")
     elif choice == 'y':
         create_backup("before_commit")
-        _commit_data(df, unknown_accs, unknown_insts, base_curr)
+        _commit_data(unknown_accs, unknown_insts, base_curr)
     else:
         print("Operation cancelled.")
     
     conn.close()
 
-def _commit_data(df, new_accs, new_isins, base_curr):
+def _commit_data(new_accs, new_isins, base_curr):
     print("Committing...")
     conn = get_connection()
     cursor = conn.cursor()
     
     try:
+        # One write transaction for the whole commit; take the write lock up front
+        conn.execute("BEGIN IMMEDIATE")
+
         # 1. Create New Accounts
         for acc_ext in new_accs:
             # Try to infer broker from ID or source file (simplified here)
@@ -125,43 +154,34 @@ def _commit_data(df, new_accs, new_isins, base_curr):
             print(f"Created account: {name} ({base_curr})")
 
         # 2. Create New Instruments
-        # We need symbol from the dataframe for these ISINs
-        unique_instruments = df[df['isin'].isin(new_isins)][['isin', 'symbol']].drop_duplicates('isin')
-        for _, row in unique_instruments.iterrows():
-            cursor.execute("INSERT INTO instruments (isin, symbol) VALUES (?, ?)", (row['isin'], row['symbol']))
-            # print(f"Created instrument: {row['symbol']} ({row['isin']})")
+        # Symbol comes from the first staged row of each new ISIN
+        if new_isins:
+            placeholders = ", ".join("?" * len(new_isins))
+            cursor.execute(f"""
+                INSERT INTO instruments (isin, symbol)
+                SELECT isin, symbol FROM transactions_staging
+                WHERE rowid IN (
+                    SELECT MIN(rowid) FROM transactions_staging WHERE isin IN ({placeholders}) GROUP BY isin
+                )
+            """, tuple(new_isins))
 
         # 3. Insert Transactions
-        # Prepare cache for lookups using the SAME cursor/connection to see uncommitted changes
-        cursor.execute("SELECT external_id, id FROM accounts")
-        acc_map = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT isin, id FROM instruments")
-        inst_map = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        count = 0
-        for _, row in df.iterrows():
-            acc_id = acc_map.get(row['account_external_id'])
-            inst_id = inst_map.get(row['isin'])
-            
-            # Skip if account missing (should not happen if logic above is correct)
-            if acc_id is None:
-                print(f"Error: Account {row['account_external_id']} not found in map.")
-                continue
-            
-            cursor.execute('''
-                INSERT INTO transactions (
-                    external_id, account_id, instrument_id, date, type,
-                    quantity, price, amount, currency,
-                    amount_local, exchange_rate, fee, fee_currency, fee_local, notes, batch_id, source_file, hash
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                row['external_id'], acc_id, inst_id, row['date'], row['type'],
-                row['quantity'], row['price'], row['amount'], row['currency'],
-                row['amount_local'], row['exchange_rate'], row['fee'], row.get('fee_currency'), row.get('fee_local'), row['description'], row.get('batch_id'), row.get('source_file'), row.get('hash')
-            ))
-            count += 1
-            
+        # Same connection, so the accounts/instruments created above are visible to the join
+        staged_total = cursor.execute("SELECT COUNT(*) FROM transactions_staging").fetchone()[0]
+        cursor.execute(COMMIT_STAGING_SQL)
+        count = cursor.rowcount
+
+        # Skipped if account missing (should not happen if logic above is correct)
+        cursor.execute("""
+            SELECT DISTINCT s.account_external_id FROM transactions_staging s
+            WHERE NOT EXISTS (SELECT 1 FROM accounts a WHERE a.external_id = s.account_external_id)
+        """)
+        for (acc_ext,) in cursor.fetchall():
+            print(f"Error: Account {acc_ext} not found in map.")
+
+        if count < staged_total:
+            print(f"Skipped {staged_total - count} staged transactions (duplicates or unknown accounts).")
+
         # 4. Clear Staging
         cursor.execute("DELETE FROM transactions_staging")
         
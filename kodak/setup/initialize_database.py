@@ -112,11 +112,34 @@ def initialize_database():
         )
     ''')
 
+    # --- 4. Indexes ---
+
+    # Data freshness per source (System page): GROUP BY source_file with MAX(date)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tx_src_date ON transactions(source_file, date)')
+
+    # Ingestion dedup (anti-join of staged rows against the ledger by account and date)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tx_acc_date ON transactions(account_id, date)')
+
+    # Duplicate check on manual entry (WHERE hash = ?)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tx_hash ON transactions(hash)')
+
+    # Nearest-price fallback (WHERE instrument_id = ? AND date <= ? ORDER BY date DESC LIMIT 1)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tx_inst_date ON transactions(instrument_id, date)')
+
+    # Income/cost reports (WHERE type = 'DIVIDEND' / 'INTEREST' / 'FEE', optionally AND date >= ?)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tx_type_date ON transactions(type, date)')
+
+    # Per-instrument rollups of one type (WHERE type IN (...) GROUP BY instrument_id)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tx_type_inst ON transactions(type, instrument_id)')
+
+    # accounts.external_id and instruments.isin are UNIQUE, so SQLite already
+    # maintains an index for each (sqlite_autoindex_*); no explicit index needed.
+
     conn.commit()
     conn.close()
     logger.info(f"Database schema ensured at {DB_PATH}")
 
-    # --- 4. Reference Templates ---
+    # --- 5. Reference Templates ---
     ref_dir = os.path.join('data', 'reference')
     os.makedirs(ref_dir, exist_ok=True)
 
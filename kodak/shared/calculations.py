@@ -1,10 +1,13 @@
+import functools
+from collections import defaultdict
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
 
-from kodak.shared.db import get_connection, get_db_connection, execute_query
-from kodak.shared.market_data import get_historical_prices_by_date, get_forward_dividends, get_exchange_rate
+from kodak.shared.db import get_read_connection, get_db_version, execute_query, disk_cache
+from kodak.shared.market_data import get_historical_prices_by_dates, get_forward_dividends, get_exchange_rate
 from kodak.shared.utils import load_config
 
 # --- Configuration ---
@@ -17,13 +20,27 @@ INFLOW_TYPES = _txn_types.get('inflow', ['BUY', 'DEPOSIT', 'TRANSFER_IN'])
 OUTFLOW_TYPES = _txn_types.get('outflow', ['SELL', 'WITHDRAWAL', 'TRANSFER_OUT'])
 EXTERNAL_FLOW_TYPES = _txn_types.get('external_flows', ['DEPOSIT', 'WITHDRAWAL', 'TRANSFER_IN', 'TRANSFER_OUT'])
 
+# --- Cost-basis replay steps (see _replay_cost_basis) ---
+STEP_NONE, STEP_QTY, STEP_IN, STEP_OUT = 0, 1, 2, 3  # no change / quantity only / buy-side / sell-side
+
+# --- Realized-performance replay types (exact type match, see get_realized_performance) ---
+REALIZED_INFLOW_TYPES = frozenset({'BUY', 'DEPOSIT', 'TRANSFER_IN', 'TILDELING INNLEGG RE', 'EMISJON INNLEGG VP'})
+REALIZED_OUTFLOW_TYPES = frozenset({'SELL', 'WITHDRAWAL', 'TRANSFER_OUT', 'INNLØSN. UTTAK VP'})
+REALIZED_SELL_TYPES = frozenset({'SELL', 'INNLØSN. UTTAK VP', 'BYTTE UTTAK VP'})
+
 def get_internal_splits() -> Dict[str, List[Tuple[pd.Timestamp, float]]]:
     """
     Discovers stock splits from 'BYTTE' (Exchange) transactions in the DB.
 
+    The result is cached until the database changes; treat it as read-only.
+
     Returns:
         Dictionary mapping symbol to list of (date, split_ratio) tuples.
     """
+    return _load_internal_splits(get_db_version())
+
+@functools.lru_cache(maxsize=1)
+def _load_internal_splits(db_version: Tuple[int, ...]) -> Dict[str, List[Tuple[pd.Timestamp, float]]]:
     query = """
         SELECT t.date, i.symbol, t.type, t.quantity
         FROM transactions t
@@ -31,18 +48,21 @@ def get_internal_splits() -> Dict[str, List[Tuple[pd.Timestamp, float]]]:
         WHERE t.type LIKE 'BYTTE %'
         ORDER BY t.date, i.symbol
     """
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    rows = conn.execute(query).fetchall()
+
+    # Pair the first IN and first OUT row per (day, symbol); plain tuples, no DataFrame needed
+    pairs = {}
+    for date, symbol, t_type, qty in rows:
+        if symbol is None or date is None: continue
+        pair = pairs.setdefault((date[:10], symbol), {})
+        pair.setdefault(t_type, qty)
 
     splits = {}
-    # Group by date and symbol to find the IN/OUT pairs
-    for (date, symbol), group in df.groupby([df['date'].str[:10], 'symbol']):
-        row_in = group[group['type'] == 'BYTTE INNLEGG VP']
-        row_out = group[group['type'] == 'BYTTE UTTAK VP']
-        
-        if not row_in.empty and not row_out.empty:
-            qty_in = row_in.iloc[0]['quantity']
-            qty_out = abs(row_out.iloc[0]['quantity'])
+    for (date, symbol), pair in sorted(pairs.items()):
+        if 'BYTTE INNLEGG VP' in pair and 'BYTTE UTTAK VP' in pair:
+            qty_in = pair['BYTTE INNLEGG VP']
+            qty_out = abs(pair['BYTTE UTTAK VP'])
             if qty_out != 0:
                 ratio = qty_in / qty_out
                 if symbol not in splits: splits[symbol] = []
@@ -65,14 +85,19 @@ def get_adjusted_qty(symbol: str, raw_qty: float, ref_date: str, split_map: Dict
     if symbol not in split_map or raw_qty == 0:
         return raw_qty
         
-    ts_ref = pd.Timestamp(ref_date)
+    ts_ref = _as_timestamp(ref_date)
     ratio = 1.0
     for split_date, split_ratio in split_map[symbol]:
         if split_date > ts_ref:
             ratio *= split_ratio
     return raw_qty * ratio
 
-def get_price_with_fallback(symbol: str, price_dict: dict, ref_date: str, missing_log: list = None) -> float:
+@functools.lru_cache(maxsize=256)
+def _as_timestamp(ref_date: str) -> pd.Timestamp:
+    """Parses a reference date once; reports reuse a handful of dates across many symbols."""
+    return pd.Timestamp(ref_date)
+
+def get_price_with_fallback(symbol: str, price_dict: dict, ref_date: str, missing_log: list = None, db_prices: Optional[dict] = None) -> float:
     """
     Attempts to get a price for a symbol, with fallback to database lookups.
 
@@ -81,6 +106,7 @@ def get_price_with_fallback(symbol: str, price_dict: dict, ref_date: str, missin
         price_dict: Dictionary of {symbol: price} from Yahoo Finance
         ref_date: Reference date for fallback lookups (YYYY-MM-DD)
         missing_log: Optional list to append missing price info for debugging
+        db_prices: Optional pre-fetched fallbacks from _prefetch_db_prices (same ref_date)
 
     Returns:
         The price as a float, or 0.0 if not found
@@ -91,43 +117,70 @@ def get_price_with_fallback(symbol: str, price_dict: dict, ref_date: str, missin
         return price
 
     # 2. Try Database (Nearest Transaction)
+    is_fx = symbol.endswith(f"{BASE_CURRENCY}=X")
+    # Reports pass prefetched fallbacks; only a standalone call reads the DB version
+    if db_prices is not None:
+        fallback = db_prices[symbol] if symbol in db_prices else _nearest_db_price(get_read_connection(), symbol, ref_date)
+    else:
+        fallback = _db_price_lookup(symbol, ref_date, get_db_version())
+    if fallback is not None:
+        if missing_log is not None:
+            missing_log.append({'symbol': symbol, 'date': ref_date, 'type': 'FX_FALLBACK' if is_fx else 'DB_FALLBACK', 'price': fallback})
+        return fallback
+    if is_fx:
+        return 1.0  # Default to 1.0 if no FX history found
+
+    if missing_log is not None:
+        missing_log.append({'symbol': symbol, 'date': ref_date, 'type': 'MISSING', 'price': 0.0})
+    return 0.0
+
+def _prefetch_db_prices(symbols: List[str], price_dict: dict, ref_date: str, conn: Optional[Any] = None) -> Dict[str, Optional[float]]:
+    """
+    Resolves the DB fallback for every symbol missing from price_dict on one connection.
+
+    Uses the same nearest-date rule as _db_price_lookup (ties go to the earlier row);
+    symbols with no history map to None. Pass conn to reuse an open connection.
+    """
+    conn = conn or get_read_connection()
+    missing = dict.fromkeys(s for s in symbols if s and price_dict.get(s, 0.0) <= 0)
+    return {s: _nearest_db_price(conn, s, ref_date) for s in missing}
+
+@functools.lru_cache(maxsize=4096)
+def _db_price_lookup(symbol: str, ref_date: str, db_version: Tuple[int, ...]) -> Optional[float]:
+    """Nearest-dated transaction price (or FX rate for 'XXXNOK=X' pairs), or None."""
+    return _nearest_db_price(get_read_connection(), symbol, ref_date)
+
+def _nearest_db_price(conn: Any, symbol: str, ref_date: str) -> Optional[float]:
     # Handle FX Pairs (e.g. HKDNOK=X)
     if symbol.endswith(f"{BASE_CURRENCY}=X"):
         curr = symbol.replace(f"{BASE_CURRENCY}=X", "")
         query = """
-            SELECT t.exchange_rate FROM transactions t
+            SELECT t.exchange_rate, t.date FROM transactions t
             JOIN instruments i ON t.instrument_id = i.id
-            WHERE i.currency = ? AND t.exchange_rate > 0
-            ORDER BY ABS(strftime('%J', t.date) - strftime('%J', ?))
+            WHERE i.currency = ? AND t.exchange_rate > 0 AND t.date {op} ?
+            ORDER BY t.date {order}, t.id
             LIMIT 1
         """
-        with get_db_connection() as conn:
-            row = conn.execute(query, (curr, ref_date)).fetchone()
-        if row:
-            if missing_log is not None:
-                missing_log.append({'symbol': symbol, 'date': ref_date, 'type': 'FX_FALLBACK', 'price': row[0]})
-            return row[0]
-        return 1.0  # Default to 1.0 if no FX history found
-
-    # Handle Standard Instruments
-    query = """
-        SELECT price FROM transactions t
-        JOIN instruments i ON t.instrument_id = i.id
-        WHERE i.symbol = ? AND t.price > 0 AND t.type IN ('BUY', 'SELL')
-        ORDER BY ABS(strftime('%J', t.date) - strftime('%J', ?))
-        LIMIT 1
-    """
-    with get_db_connection() as conn:
-        row = conn.execute(query, (symbol, ref_date)).fetchone()
-
-    if row:
-        if missing_log is not None:
-            missing_log.append({'symbol': symbol, 'date': ref_date, 'type': 'DB_FALLBACK', 'price': row[0]})
-        return row[0]
-
-    if missing_log is not None:
-        missing_log.append({'symbol': symbol, 'date': ref_date, 'type': 'MISSING', 'price': 0.0})
-    return 0.0
+        key = curr
+    else:
+        # Handle Standard Instruments
+        query = """
+            SELECT t.price, t.date FROM transactions t
+            JOIN instruments i ON t.instrument_id = i.id
+            WHERE i.symbol = ? AND t.price > 0 AND t.type IN ('BUY', 'SELL') AND t.date {op} ?
+            ORDER BY t.date {order}, t.id
+            LIMIT 1
+        """
+        key = symbol
+    # Two index probes (nearest on or before, nearest after) instead of sorting every row by distance
+    before = conn.execute(query.format(op='<=', order='DESC'), (key, ref_date)).fetchone()
+    after = conn.execute(query.format(op='>', order='ASC'), (key, ref_date)).fetchone()
+    if before is None or after is None:
+        row = before or after
+    else:
+        ref = pd.Timestamp(ref_date)
+        row = before if ref - pd.Timestamp(str(before[1])) <= pd.Timestamp(str(after[1])) - ref else after
+    return row[0] if row else None
 
 
 def xirr(transactions: List[Tuple[datetime, float]]) -> float:
@@ -140,27 +193,84 @@ def xirr(transactions: List[Tuple[datetime, float]]) -> float:
     Returns:
         The annualized return rate as a decimal (e.g., 0.15 for 15%)
     """
-    if not transactions: return 0.0
-    transactions.sort(key=lambda x: x[0])
-    amounts = [t[1] for t in transactions]
-    if all(a >= 0 for a in amounts) or all(a <= 0 for a in amounts): return 0.0
-    dates = [t[0] for t in transactions]; d0 = dates[0]
-    years = [(d - d0).days / 365.0 for d in dates]
-    rate = 0.1
-    for _ in range(50):
-        f = 0.0; df = 0.0
-        for i, year in enumerate(years):
-            a = amounts[i]; r_plus_1 = (1 + rate)
-            if r_plus_1 <= 0: r_plus_1 = 1e-6 
-            exp = r_plus_1 ** year
-            f += a / exp
-            df -= a * year * (r_plus_1 ** (year - 1)) / (exp ** 2)
-        if abs(f) < 1e-6: return float(rate.real) if hasattr(rate, 'real') else float(rate)
-        if df == 0: break
-        new_rate = rate - f / df
-        if abs(new_rate - rate) < 1e-6: return float(new_rate.real) if hasattr(new_rate, 'real') else float(new_rate)
-        rate = new_rate
-    return float(rate.real) if hasattr(rate, 'real') else float(rate)
+    if transactions: transactions.sort(key=lambda x: x[0])
+    return xirr_many([transactions])[0]
+
+def xirr_many(flow_lists: List[List[Tuple[datetime, float]]]) -> List[float]:
+    """
+    XIRR for many independent cash-flow lists, solved together.
+
+    Args:
+        flow_lists: One list of (date, amount) tuples per series (e.g. per symbol)
+
+    Returns:
+        The annualized return rate per series, in input order (0.0 where undefined)
+    """
+    rates = [0.0] * len(flow_lists)
+    series = []; amounts = []; years = []; counts = []
+    for n, flows in enumerate(flow_lists):
+        if not flows: continue
+        flows = sorted(flows, key=lambda x: x[0])
+        amts = [t[1] for t in flows]
+        if all(a >= 0 for a in amts) or all(a <= 0 for a in amts): continue
+        d0 = flows[0][0]
+        series.append(n); counts.append(len(amts))
+        amounts.extend(amts); years.extend((t[0] - d0).days / 365.0 for t in flows)
+    if series:
+        solved = _xirr_newton(np.array(amounts, dtype=float), np.array(years), np.array(counts))
+        for n, rate in zip(series, solved.tolist()): rates[n] = rate
+    return rates
+
+def _xirr_newton(amounts: np.ndarray, years: np.ndarray, counts: np.ndarray, rate0: float = 0.1) -> np.ndarray:
+    """
+    Newton-Raphson solve of NPV(rate) = 0 for consecutive groups of flows.
+
+    amounts/years hold every group back to back and counts gives each group's length;
+    one iteration advances every unsolved group, each stopping by the scalar rules.
+    """
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rate = np.full(len(counts), rate0)
+    done = np.zeros(len(counts), dtype=bool)
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        for _ in range(50):
+            r_plus_1 = 1 + rate
+            r_plus_1[r_plus_1 <= 0] = 1e-6
+            r_rows = np.repeat(r_plus_1, counts)
+            exp = r_rows ** years
+            f = np.add.reduceat(amounts / exp, starts)
+            df = -np.add.reduceat(amounts * years / (exp * r_rows), starts)
+            stop = ~done & ((np.abs(f) < 1e-6) | (df == 0))
+            step = ~done & ~stop
+            new_rate = rate - f / df
+            converged = step & (np.abs(new_rate - rate) < 1e-6)
+            rate = np.where(step, new_rate, rate)
+            done |= stop | converged
+            if done.all(): break
+    return rate
+
+def _replay_cost_basis(steps: np.ndarray, qtys: np.ndarray, amts: np.ndarray) -> Tuple[List[float], List[float]]:
+    """
+    Replays one position's transactions under average-cost rules.
+
+    Args:
+        steps: STEP_* code per row (in date order)
+        qtys: Signed quantity per row
+        amts: Local amount per row
+
+    Returns:
+        Running (quantity, cost basis) lists, one entry per row.
+    """
+    qty_cum = []; cost_cum = []
+    qty_h = 0.0; cost_h = 0.0
+    # abs() is taken once per column up front instead of per row
+    for step, qty, abs_qty, abs_amt in zip(steps.tolist(), qtys.tolist(), np.abs(qtys).tolist(), np.abs(amts).tolist()):
+        if step == STEP_QTY: qty_h += qty # Split withdrawal: do NOT reduce cost
+        elif step == STEP_IN: qty_h += qty; cost_h += abs_amt
+        elif step == STEP_OUT:
+            if qty_h > 0: cost_h -= (cost_h / qty_h) * abs_qty
+            qty_h += qty
+        qty_cum.append(qty_h); cost_cum.append(cost_h)
+    return qty_cum, cost_cum
 
 def get_yearly_contribution(target_year: str) -> Tuple[pd.DataFrame, float, List[Dict[str, Any]]]:
     query = """
@@ -170,9 +280,11 @@ def get_yearly_contribution(target_year: str) -> Tuple[pd.DataFrame, float, List
         WHERE t.date <= ?
         ORDER BY t.date, t.id
     """
-    with get_db_connection() as conn:
-        df = pd.read_sql(query, conn, params=(f"{target_year}-12-31",))
+    conn = get_read_connection()
+    df = pd.read_sql(query, conn, params=(f"{target_year}-12-31",))
     if df.empty: return pd.DataFrame(), 0.0
+    # Several type masks below: compare against a few categories instead of every row's string
+    df['type'] = df['type'].astype('category')
     
     soy_date = f"{int(target_year)-1}-12-31"
     # For current year, use today's date instead of Dec 31
@@ -181,64 +293,52 @@ def get_yearly_contribution(target_year: str) -> Tuple[pd.DataFrame, float, List
     split_map = get_internal_splits()
 
     # 1. External Flows (Portfolio Level)
-    flow_txns = df[df['type'].isin(EXTERNAL_FLOW_TYPES)].copy()
-    flow_txns['date_obj'] = pd.to_datetime(flow_txns['date'], format='mixed')
-    yearly_detailed_flows = {}
-    for _, row in flow_txns.iterrows():
-        y = str(row['date'])[:4]; d = row['date_obj']; amt = row['amount_local']
-        if y not in yearly_detailed_flows: yearly_detailed_flows[y] = []
-        yearly_detailed_flows[y].append((d, -amt))
-
-    # 2. Replay Loop State
-    holdings = {}; soy_holdings = {}; eoy_holdings = {}; pos_flows = {}; dividends = {}; detailed_flows = {}
-    cash_soy = 0.0; cash_eoy = 0.0; cash_flows_ext = 0.0
-    fees_t = 0.0; int_t = 0.0; tax_t = 0.0
-    sym_currency = {}
-
-    for _, row in df.iterrows():
-        t_date = row['date'][:10]; t_date_obj = pd.to_datetime(t_date); t_year = t_date[:4]; t_type = row['type']; qty = row['quantity']; amt = row['amount_local']
-        sym = row['symbol']
-        
-        # Track Cash
-        if t_date <= soy_date: cash_soy += amt
-        cash_eoy += amt
-        
-        if t_year == target_year:
-            if t_type in EXTERNAL_FLOW_TYPES: cash_flows_ext += amt
-            elif t_type == 'FEE': fees_t += amt
-            elif t_type == 'INTEREST': int_t += amt
-            elif t_type == 'TAX': tax_t += amt
-            f_emb = row.get('fee_local', 0.0)
-            if pd.notna(f_emb) and f_emb > 0: fees_t -= abs(f_emb)
-        
-        # Track Positions
-        if sym:
-            sym_currency[sym] = row['currency']
-            if sym not in holdings: holdings[sym] = {'qty': 0.0, 'cost': 0.0}
-            h = holdings[sym]
-            
-            if t_type in ['BUY', 'SELL', 'INNLØSN. UTTAK VP', 'TILDELING INNLEGG RE', 'BYTTE INNLEGG VP', 'BYTTE UTTAK VP', 'TRANSFER_IN', 'TRANSFER_OUT', 'EMISJON INNLEGG VP']:
-                # Special Split Handling
-                if t_type == 'BYTTE UTTAK VP':
-                    h['qty'] += qty # negative
-                    # Do NOT reduce cost
-                elif t_type == 'BYTTE INNLEGG VP':
-                    h['qty'] += qty
-                    h['cost'] += abs(amt)
-                elif t_type in INFLOW_TYPES: h['qty'] += qty; h['cost'] += abs(amt)
-                elif t_type in OUTFLOW_TYPES:
-                    if h['qty'] > 0: h['cost'] -= (h['cost'] / h['qty']) * abs(qty)
-                    h['qty'] += qty
-            
-            # Save Snapshots
-            if t_date <= soy_date: soy_holdings[sym] = h.copy()
-            eoy_holdings[sym] = h.copy()
-
-            if t_year == target_year and t_type in ['BUY', 'SELL', 'INNLØSN. UTTAK VP', 'DIVIDEND']:
-                if sym not in detailed_flows: detailed_flows[sym] = []
-                detailed_flows[sym].append((t_date_obj, amt))
-                if t_type == 'DIVIDEND': dividends[sym] = dividends.get(sym, 0.0) + amt
-                else: pos_flows[sym] = pos_flows.get(sym, 0.0) + amt
+    t_dates = df['date'].str[:10]
+    in_year = (t_dates.str[:4] == target_year).to_numpy()
+    is_ext = df['type'].isin(EXTERNAL_FLOW_TYPES).to_numpy()
+    flow_txns = df[is_ext & in_year]
+    year_flows = list(zip(pd.to_datetime(flow_txns['date'], format='mixed'), -flow_txns['amount_local']))
+
+    # 2. Cash & Income (vectorized over all rows)
+    amts = df['amount_local'].to_numpy(dtype=float)
+    fees_emb = df['fee_local'].to_numpy(dtype=float)
+    in_soy = (t_dates <= soy_date).to_numpy()
+    other_year = in_year & ~is_ext
+
+    cash_soy = amts[in_soy].sum()
+    cash_eoy = amts.sum()
+    cash_flows_ext = amts[in_year & is_ext].sum()
+    fees_t = amts[other_year & (df['type'] == 'FEE').to_numpy()].sum() - np.abs(fees_emb[in_year & (fees_emb > 0)]).sum()
+    int_t = amts[other_year & (df['type'] == 'INTEREST').to_numpy()].sum()
+    tax_t = amts[other_year & (df['type'] == 'TAX').to_numpy()].sum()
+
+    # 3. Positions: only the running cost basis needs a sequential replay
+    pos_df = df[df['symbol'].notna() & (df['symbol'] != '')]
+    sym_currency = pos_df.drop_duplicates('symbol', keep='last').set_index('symbol')['currency'].to_dict()
+
+    p_types = pos_df['type']
+    is_pos_type = p_types.isin(['BUY', 'SELL', 'INNLØSN. UTTAK VP', 'TILDELING INNLEGG RE', 'BYTTE INNLEGG VP', 'BYTTE UTTAK VP', 'TRANSFER_IN', 'TRANSFER_OUT', 'EMISJON INNLEGG VP'])
+    steps = np.select(
+        [~is_pos_type, p_types == 'BYTTE UTTAK VP', p_types == 'BYTTE INNLEGG VP', p_types.isin(INFLOW_TYPES), p_types.isin(OUTFLOW_TYPES)],
+        [STEP_NONE, STEP_QTY, STEP_IN, STEP_IN, STEP_OUT], default=STEP_NONE)
+    p_qty = pos_df['quantity'].to_numpy(dtype=float)
+    p_amt = pos_df['amount_local'].to_numpy(dtype=float)
+    p_in_soy = in_soy[pos_df.index.to_numpy()]
+
+    soy_holdings = {}; eoy_holdings = {}
+    for sym, rows in pos_df.groupby('symbol', sort=False).indices.items():
+        qty_cum, cost_cum = _replay_cost_basis(steps[rows], p_qty[rows], p_amt[rows])
+        n_soy = int(p_in_soy[rows].sum())
+        if n_soy: soy_holdings[sym] = {'qty': qty_cum[n_soy - 1], 'cost': cost_cum[n_soy - 1]}
+        eoy_holdings[sym] = {'qty': qty_cum[-1], 'cost': cost_cum[-1]}
+
+    # Per-symbol flows for the target year
+    pos_flows = {}; dividends = {}; detailed_flows = {}
+    sym_flows = pos_df[in_year[pos_df.index.to_numpy()] & p_types.isin(['BUY', 'SELL', 'INNLØSN. UTTAK VP', 'DIVIDEND'])]
+    for sym, t_type, t_date_obj, amt in zip(sym_flows['symbol'], sym_flows['type'], pd.to_datetime(t_dates[sym_flows.index]), sym_flows['amount_local']):
+        detailed_flows.setdefault(sym, []).append((t_date_obj, amt))
+        if t_type == 'DIVIDEND': dividends[sym] = dividends.get(sym, 0.0) + amt
+        else: pos_flows[sym] = pos_flows.get(sym, 0.0) + amt
 
     # Cleanup tiny positions
     soy_holdings = {k: v for k, v in soy_holdings.items() if abs(v['qty']) > 0.001}
@@ -253,70 +353,73 @@ def get_yearly_contribution(target_year: str) -> Tuple[pd.DataFrame, float, List
         if c != BASE_CURRENCY:
             pair = f"{c}{BASE_CURRENCY}=X"; fetch_list.append(pair); fx_map[c] = pair
     
-    p_soy = get_historical_prices_by_date(fetch_list, soy_date)
-    p_eoy = get_historical_prices_by_date(fetch_list, eoy_date)
+    snapshot_prices = get_historical_prices_by_dates(fetch_list, [soy_date, eoy_date])
+    p_soy = snapshot_prices[soy_date]
+    p_eoy = snapshot_prices[eoy_date]
 
     missing_prices = []
 
-    def calc_snapshot_eq(h_dict, p_dict, cash_v, ref_date):
-        total_v = 0.0
+    # Resolve DB fallbacks for both snapshots on one connection
+    conn = get_read_connection()
+    db_soy = _prefetch_db_prices(fetch_list, p_soy, soy_date, conn)
+    db_eoy = _prefetch_db_prices(fetch_list, p_eoy, eoy_date, conn)
+
+    def calc_snapshot_eq(h_dict, p_dict, db_prices, cash_v, ref_date):
+        sym_values = {}; fx_rates = {}
         for s, h in h_dict.items():
             if abs(h['qty']) < 0.001: continue
-            p = get_price_with_fallback(s, p_dict, ref_date, missing_prices)
+            p = get_price_with_fallback(s, p_dict, ref_date, missing_prices, db_prices)
             curr = sym_currency.get(s, BASE_CURRENCY)
             r = 1.0
             if curr != BASE_CURRENCY:
-                pair = fx_map.get(curr)
-                r = get_price_with_fallback(pair, p_dict, ref_date, missing_prices)
+                # One lookup per currency, shared by all its symbols
+                if curr not in fx_rates: fx_rates[curr] = get_price_with_fallback(fx_map.get(curr), p_dict, ref_date, missing_prices, db_prices)
+                r = fx_rates[curr]
 
             adj_q = get_adjusted_qty(s, h['qty'], ref_date, split_map)
-            total_v += (adj_q * p * r) if p > 0 else h['cost']
-        return total_v + cash_v
+            sym_values[s] = (adj_q * p * r) if p > 0 else h['cost']
+        return sum(sym_values.values()) + cash_v, sym_values
 
-    eq_soy = calc_snapshot_eq(soy_holdings, p_soy, cash_soy, soy_date)
-    eq_eoy = calc_snapshot_eq(eoy_holdings, p_eoy, cash_eoy, eoy_date)
+    eq_soy, sym_soy = calc_snapshot_eq(soy_holdings, p_soy, db_soy, cash_soy, soy_date)
+    eq_eoy, sym_eoy = calc_snapshot_eq(eoy_holdings, p_eoy, db_eoy, cash_eoy, eoy_date)
     total_portfolio_profit = eq_eoy - eq_soy - cash_flows_ext
     
     # Portfolio XIRR
     x_flows = []
     if eq_soy > 0: x_flows.append((pd.Timestamp(soy_date), -eq_soy))
-    x_flows.extend(yearly_detailed_flows.get(target_year, []))
+    x_flows.extend(year_flows)
     if eq_eoy > 0: x_flows.append((pd.Timestamp(eoy_date), eq_eoy))
     total_portfolio_xirr = xirr(x_flows) * 100
 
-    # Build Result
-    report = []
+    # Build Result (column-wise; symbol rows get their IRR % after the batched solve)
+    report_cols = ['Symbol', 'SOY Value', 'EOY Value', 'Net Additions', 'Dividends', 'Profit', 'IRR %']
+    report = {c: [] for c in report_cols}; report_flows = []
+    def add_row(*values):
+        for c, v in zip(report_cols, values): report[c].append(v)
+
     sum_pos_profit = 0.0
     for s in all_pos_syms:
-        def get_v(h_d, p_d, ref_d):
-            h = h_d.get(s, {'qty': 0.0, 'cost': 0.0})
-            p = get_price_with_fallback(s, p_d, ref_d, missing_prices)
-            curr = sym_currency.get(s, BASE_CURRENCY)
-            r = 1.0
-            if curr != BASE_CURRENCY:
-                pair = fx_map.get(curr)
-                r = get_price_with_fallback(pair, p_d, ref_d, missing_prices)
-            aq = get_adjusted_qty(s, h['qty'], ref_d, split_map)
-            return (aq * p * r) if p > 0 else h['cost']
-        vs = get_v(soy_holdings, p_soy, soy_date)
-        ve = get_v(eoy_holdings, p_eoy, eoy_date)
+        vs = sym_soy.get(s, 0.0)
+        ve = sym_eoy.get(s, 0.0)
         nf = pos_flows.get(s, 0.0)
         dv = dividends.get(s, 0.0)
         profit = ve - vs + nf + dv; sum_pos_profit += profit
-        i_x_flows = []
-        if vs > 0: i_x_flows.append((pd.Timestamp(soy_date), -vs))
-        i_x_flows.extend(detailed_flows.get(s, []))
-        if ve > 0: i_x_flows.append((pd.Timestamp(eoy_date), ve))
-        i_irr = xirr(i_x_flows) * 100
         if abs(vs) > 1 or abs(ve) > 1 or abs(profit) > 1:
-            report.append({'Symbol': s, 'SOY Value': vs, 'EOY Value': ve, 'Net Additions': -nf, 'Dividends': dv, 'Profit': profit, 'IRR %': i_irr})
+            i_x_flows = []
+            if vs > 0: i_x_flows.append((pd.Timestamp(soy_date), -vs))
+            i_x_flows.extend(detailed_flows.get(s, []))
+            if ve > 0: i_x_flows.append((pd.Timestamp(eoy_date), ve))
+            add_row(s, vs, ve, -nf, dv, profit)
+            report_flows.append(i_x_flows)
+    # Per-symbol IRRs are independent: solve them in one batch
+    report['IRR %'] = [i_irr * 100 for i_irr in xirr_many(report_flows)]
 
     float_profit = total_portfolio_profit - sum_pos_profit
     c_fx = float_profit - (fees_t + int_t + tax_t)
-    if abs(fees_t) > 0.1: report.append({'Symbol': '[Fees]', 'SOY Value': 0, 'EOY Value': 0, 'Net Additions': 0, 'Dividends': 0, 'Profit': fees_t, 'IRR %': 0})
-    if abs(int_t) > 0.1: report.append({'Symbol': '[Interest]', 'SOY Value': 0, 'EOY Value': 0, 'Net Additions': 0, 'Dividends': 0, 'Profit': int_t, 'IRR %': 0})
-    if abs(tax_t) > 0.1: report.append({'Symbol': '[Div Tax]', 'SOY Value': 0, 'EOY Value': 0, 'Net Additions': 0, 'Dividends': 0, 'Profit': tax_t, 'IRR %': 0})
-    report.append({'Symbol': '[Cash FX & Float]*', 'SOY Value': cash_soy, 'EOY Value': cash_eoy, 'Net Additions': cash_flows_ext, 'Dividends': 0, 'Profit': c_fx, 'IRR %': 0.0})
+    if abs(fees_t) > 0.1: add_row('[Fees]', 0, 0, 0, 0, fees_t, 0)
+    if abs(int_t) > 0.1: add_row('[Interest]', 0, 0, 0, 0, int_t, 0)
+    if abs(tax_t) > 0.1: add_row('[Div Tax]', 0, 0, 0, 0, tax_t, 0)
+    add_row('[Cash FX & Float]*', cash_soy, cash_eoy, cash_flows_ext, 0, c_fx, 0.0)
     df_res = pd.DataFrame(report)
     df_res['Contribution %'] = (df_res['Profit'] / total_portfolio_profit) * total_portfolio_xirr if abs(total_portfolio_profit) > 1 else 0.0
     return df_res.sort_values('Profit', ascending=False), total_portfolio_xirr, missing_prices
@@ -328,71 +431,89 @@ def get_yearly_equity_curve() -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
         LEFT JOIN instruments i ON t.instrument_id = i.id
         ORDER BY t.date, t.id
     """
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query(query, conn)
     if df.empty: return pd.DataFrame()
-    df['year'] = df['date'].str[:4]; years = sorted(df['year'].unique())
+    df['year'] = df['date'].str[:4]
     split_map = get_internal_splits()
     holdings = {}; cash_balance = 0.0; results = []
     # 1. External Flows (Portfolio Level)
-    flow_txns = df[df['type'].isin(EXTERNAL_FLOW_TYPES)].copy()
-    flow_txns['date_obj'] = pd.to_datetime(flow_txns['date'], format='mixed')
-    y_flows = {}
-    for _, row in flow_txns.iterrows():
-        y = row['year']; d = row['date_obj']; amt = row['amount_local']
-        if y not in y_flows: y_flows[y] = []
-        y_flows[y].append((d, -amt))
+    flow_txns = df[df['type'].isin(EXTERNAL_FLOW_TYPES)]
+    flow_txns = flow_txns.assign(date_obj=pd.to_datetime(flow_txns['date'], format='mixed'), neg_amt=-flow_txns['amount_local'])
+    y_flows = {y: list(zip(g['date_obj'], g['neg_amt'])) for y, g in flow_txns.groupby('year', sort=False)}
     previous_equity = 0.0
     missing_prices = []
-
-    for year in years:
-        for _, row in df[df['year'] == year].iterrows():
-            t_type = row['type']; qty = row['quantity']; amt = row['amount_local']; cash_balance += amt; sym = row['symbol']
-            if sym:
-                if sym not in holdings: holdings[sym] = {'qty': 0.0, 'cost': 0.0, 'curr': row['currency']}
+    # For current year, use today's date instead of Dec 31
+    today = datetime.now().strftime("%Y-%m-%d")
+    year_ends = {year: (today if year == today[:4] else f"{year}-12-31") for year in sorted(df['year'].unique())}
+
+    # One price download for every year-end, covering anything that is ever held
+    pos_rows = df[df['symbol'].notna() & (df['symbol'] != '')]
+    ever_held = list(dict.fromkeys(pos_rows['symbol']))
+    ever_held += list(dict.fromkeys(f"{c}{BASE_CURRENCY}=X" for c in pos_rows['currency'] if c != BASE_CURRENCY))
+    prices_by_date = get_historical_prices_by_dates(ever_held, list(year_ends.values()))
+
+    df = df.assign(abs_qty=df['quantity'].abs(), abs_amt=df['amount_local'].abs())
+    # One connection serves every year's price fallbacks
+    conn = get_read_connection()
+    for year, year_df in df.groupby('year', sort=True):
+        for t_type, qty, amt, abs_qty, abs_amt, sym, curr in year_df[['type', 'quantity', 'amount_local', 'abs_qty', 'abs_amt', 'symbol', 'currency']].itertuples(index=False, name=None):
+            cash_balance += amt
+            if pd.notna(sym) and sym:
+                if sym not in holdings: holdings[sym] = {'qty': 0.0, 'cost': 0.0, 'curr': curr}
                 h = holdings[sym]
                 # Split Handling
                 if t_type == 'BYTTE UTTAK VP':
                     h['qty'] += qty
                 elif t_type == 'BYTTE INNLEGG VP':
                     h['qty'] += qty
-                    h['cost'] += abs(amt)
-                elif t_type in INFLOW_TYPES: h['qty'] += qty; h['cost'] += abs(amt)
+                    h['cost'] += abs_amt
+                elif t_type in INFLOW_TYPES: h['qty'] += qty; h['cost'] += abs_amt
                 elif t_type in OUTFLOW_TYPES:
-                    if h['qty'] > 0: h['cost'] -= (h['cost'] / h['qty']) * abs(qty)
+                    if h['qty'] > 0: h['cost'] -= (h['cost'] / h['qty']) * abs_qty
                     h['qty'] += qty
         to_remove = [k for k, v in holdings.items() if abs(v['qty']) < 0.001]
         for k in to_remove: del holdings[k]
-        # For current year, use today's date instead of Dec 31
-        today = datetime.now().strftime("%Y-%m-%d")
-        date_str = today if year == today[:4] else f"{year}-12-31"
+        date_str = year_ends[year]
         fetch_list = list(holdings.keys())
         for s in list(holdings.keys()):
             if holdings[s]['curr'] != BASE_CURRENCY:
                 pair = f"{holdings[s]['curr']}{BASE_CURRENCY}=X"
                 if pair not in fetch_list: fetch_list.append(pair)
-        price_data = get_historical_prices_by_date(fetch_list, date_str)
-        equity_holdings = 0.0
+        price_data = prices_by_date[date_str]
+        db_prices = _prefetch_db_prices(fetch_list, price_data, date_str, conn)
+        equity_holdings = 0.0; fx_rates = {}
         for s, h in holdings.items():
-            price = get_price_with_fallback(s, price_data, date_str, missing_prices)
+            price = get_price_with_fallback(s, price_data, date_str, missing_prices, db_prices)
             rate = 1.0
             if h['curr'] != BASE_CURRENCY:
                 pair = f"{h['curr']}{BASE_CURRENCY}=X"
-                rate = get_price_with_fallback(pair, price_data, date_str, missing_prices)
+                if pair not in fx_rates: fx_rates[pair] = get_price_with_fallback(pair, price_data, date_str, missing_prices, db_prices)
+                rate = fx_rates[pair]
             aq = get_adjusted_qty(s, h['qty'], date_str, split_map)
             val = (aq * price * rate) if price > 0 else h['cost']
-            
+        
             equity_holdings += val
         total_equity = equity_holdings + cash_balance
         x_flows = []
         if previous_equity > 0: x_flows.append((pd.Timestamp(f"{int(year)-1}-12-31"), -previous_equity))
         x_flows.extend(y_flows.get(year, []))
         if total_equity > 0: x_flows.append((pd.Timestamp(date_str), total_equity))
-        
+    
         results.append({'year': year, 'start_equity': previous_equity, 'net_flow': sum([-a for _, a in y_flows.get(year, [])]), 'end_equity': total_equity, 'profit': total_equity - previous_equity - sum([-a for _, a in y_flows.get(year, [])]), 'return_pct': xirr(x_flows) * 100})
         previous_equity = total_equity
     return pd.DataFrame(results), missing_prices
 
+def _holdings_step(t_type: str) -> int:
+    """Cost-basis step for a transaction type as get_holdings classifies it (substring match)."""
+    # Special handling for Internal Splits/Exchanges (Same Instrument):
+    # we preserve the cost basis on withdrawal and carry it over to the new shares.
+    if t_type == 'BYTTE UTTAK VP': return STEP_QTY
+    if t_type == 'BYTTE INNLEGG VP': return STEP_IN
+    if any(t in t_type for t in INFLOW_TYPES): return STEP_IN
+    if any(t in t_type for t in OUTFLOW_TYPES): return STEP_OUT
+    return STEP_NONE
+
 def get_holdings(date: Optional[str] = None) -> pd.DataFrame:
     date_filter = ""
     params = []
@@ -406,33 +527,50 @@ def get_holdings(date: Optional[str] = None) -> pd.DataFrame:
         WHERE t.instrument_id IS NOT NULL {date_filter}
         ORDER BY t.instrument_id, t.date
     """
-    with get_db_connection() as conn:
-        df = pd.read_sql(query, conn, params=params)
+    conn = get_read_connection()
+    df = pd.read_sql(query, conn, params=params)
     if df.empty: return pd.DataFrame()
+    steps = df['type'].map({t: _holdings_step(t) for t in df['type'].unique()}).to_numpy()
+    qtys = df['quantity'].to_numpy(dtype=float)
+    amts = df['amount_local'].to_numpy(dtype=float)
+
+    # Rows arrive sorted by instrument_id, so each instrument is one contiguous run
+    inst_ids = df['instrument_id'].to_numpy()
+    starts = np.flatnonzero(np.diff(inst_ids, prepend=inst_ids[0] - 1))
+    ends = np.append(starts[1:], len(df))
     final_holdings = []
-    for inst_id, group in df.groupby('instrument_id'):
-        total_qty = 0.0; total_cost = 0.0; first_row = group.iloc[0]
-        for _, row in group.iterrows():
-            t_type = row['type']
-            
-            # Special handling for Internal Splits/Exchanges (Same Instrument)
-            # We preserve the cost basis on withdrawal and carry it over to the new shares.
-            if t_type == 'BYTTE UTTAK VP':
-                total_qty += row['quantity'] # quantity is negative
-                continue
-            
-            if t_type == 'BYTTE INNLEGG VP':
-                total_qty += row['quantity']
-                total_cost += abs(row['amount_local']) # Should be 0, but add just in case
-                continue
-
-            if any(t in t_type for t in INFLOW_TYPES): total_qty += row['quantity']; total_cost += abs(row['amount_local'])
-            elif any(t in t_type for t in OUTFLOW_TYPES):
-                if total_qty > 0: total_cost -= (total_cost / total_qty) * abs(row['quantity'])
-                total_qty += row['quantity']
-        if abs(total_qty) > 0.001: final_holdings.append({'instrument_id': inst_id, 'symbol': first_row['symbol'], 'isin': first_row['isin'], 'quantity': total_qty, 'cost_basis_local': max(0, total_cost)})
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        qty_cum, cost_cum = _replay_cost_basis(steps[start:end], qtys[start:end], amts[start:end])
+        total_qty = qty_cum[-1]; total_cost = cost_cum[-1]
+        if abs(total_qty) > 0.001: final_holdings.append({'instrument_id': inst_ids[start], 'symbol': df['symbol'].iat[start], 'isin': df['isin'].iat[start], 'quantity': total_qty, 'cost_basis_local': max(0, total_cost)})
     return pd.DataFrame(final_holdings)
 
+def get_holdings_qty_only(date: Optional[str] = None) -> pd.DataFrame:
+    """
+    Open positions without cost basis, summed in SQL.
+
+    Same quantities as get_holdings() (instrument_id, symbol, isin, quantity), for
+    callers that never read cost_basis_local.
+    """
+    date_filter = ""
+    params = []
+    if date:
+        date_filter = "AND t.date <= ?"
+        params = [date]
+    query = f"""
+        SELECT t.instrument_id, i.symbol, i.isin, t.type, SUM(t.quantity) AS quantity
+        FROM transactions t
+        LEFT JOIN instruments i ON t.instrument_id = i.id
+        WHERE t.instrument_id IS NOT NULL {date_filter}
+        GROUP BY t.instrument_id, i.symbol, i.isin, t.type
+    """
+    conn = get_read_connection()
+    df = pd.read_sql(query, conn, params=params)
+    if df.empty: return pd.DataFrame()
+    df = df[df['type'].map({t: _holdings_step(t) for t in df['type'].unique()}) != STEP_NONE]
+    qty = df.groupby('instrument_id', sort=True).agg(symbol=('symbol', 'first'), isin=('isin', 'first'), quantity=('quantity', 'sum')).reset_index()
+    return qty[qty['quantity'].abs() > 0.001].reset_index(drop=True)
+
 def get_income_and_costs() -> Dict[str, float]:
     row = execute_query('''
         SELECT
@@ -464,8 +602,8 @@ def get_fee_analysis() -> pd.DataFrame:
         JOIN accounts a ON t.account_id = a.id
         WHERE t.type IN ('BUY', 'SELL')
     """
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query(query, conn)
 
     if df.empty:
         return pd.DataFrame(columns=['broker', 'total_traded', 'total_fees', 'fee_per_100', 'num_trades'])
@@ -501,8 +639,8 @@ def get_platform_fees() -> pd.DataFrame:
         JOIN accounts a ON t.account_id = a.id
         WHERE t.type = 'FEE'
     """
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query(query, conn)
 
     if df.empty:
         return pd.DataFrame(columns=['broker', 'total_fees', 'monthly_avg', 'num_charges'])
@@ -527,28 +665,33 @@ def get_platform_fees() -> pd.DataFrame:
 
 
 def get_total_xirr() -> float:
-    with get_db_connection() as conn:
-        df = pd.read_sql_query("SELECT date, type, amount_local FROM transactions", conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query("SELECT date, type, amount_local FROM transactions", conn)
     if df.empty: return 0.0
     # 1. External Flows (Portfolio Level)
-    flow_txns = df[df['type'].isin(EXTERNAL_FLOW_TYPES)].copy()
-    flow_txns['date_obj'] = pd.to_datetime(flow_txns['date'], format='mixed')
-    x_flows = [(row['date_obj'], -row['amount_local']) for _, row in flow_txns.iterrows()]
+    flow_txns = df[df['type'].isin(EXTERNAL_FLOW_TYPES)]
+    x_flows = list(zip(pd.to_datetime(flow_txns['date'], format='mixed'), -flow_txns['amount_local']))
     df_h = get_holdings()
     total_mv = 0.0
     if not df_h.empty:
         from kodak.shared.market_data import get_latest_prices, get_exchange_rate
         prices = get_latest_prices(df_h['instrument_id'].tolist())
-        for _, r in df_h.iterrows():
-            m = prices.get(r['instrument_id'])
+        for inst_id, qty, cost in df_h[['instrument_id', 'quantity', 'cost_basis_local']].itertuples(index=False, name=None):
+            m = prices.get(inst_id)
             if m:
                 p, c = m; fx = get_exchange_rate(c, BASE_CURRENCY) if c != BASE_CURRENCY else 1.0
-                total_mv += r['quantity'] * p * fx
-            else: total_mv += r['cost_basis_local']
+                total_mv += qty * p * fx
+            else: total_mv += cost
     curr_eq = total_mv + df['amount_local'].sum()
     if curr_eq > 0: x_flows.append((pd.Timestamp.now(), curr_eq))
     return xirr(x_flows) * 100
 
+@functools.lru_cache(maxsize=1)
+def _instrument_labels(db_version: Tuple[int, ...]) -> Dict[int, Optional[str]]:
+    """{instrument id: symbol, or ISIN if no symbol}; cached until the DB changes."""
+    conn = get_read_connection()
+    return dict(conn.execute("SELECT id, COALESCE(symbol, isin) FROM instruments").fetchall())
+
 def get_dividend_details():
     """
     Returns detailed dividend data:
@@ -556,43 +699,36 @@ def get_dividend_details():
     2. Top payers (Current Year)
     3. Top payers (All Time)
     """
-    current_year = datetime.now().strftime('%Y')
-
-    with get_db_connection() as conn:
-        # 1. Yearly
-        df_yearly = pd.read_sql_query("""
-            SELECT
-                strftime('%Y', date) as year,
-                SUM(amount_local) as total
-            FROM transactions
-            WHERE type = 'DIVIDEND'
-            GROUP BY year
-            ORDER BY year
-        """, conn)
-
-        # 2. By Ticker (Current Year)
-        df_current_year = pd.read_sql_query("""
-            SELECT
-                COALESCE(i.symbol, i.isin) as symbol,
-                SUM(t.amount_local) as total
-            FROM transactions t
-            LEFT JOIN instruments i ON t.instrument_id = i.id
-            WHERE t.type = 'DIVIDEND' AND t.date LIKE ?
-            GROUP BY symbol
-            ORDER BY total DESC
-        """, conn, params=(f"{current_year}%",))
-
-        # 3. By Ticker (All Time)
-        df_all_time = pd.read_sql_query("""
-            SELECT
-                COALESCE(i.symbol, i.isin) as symbol,
-                SUM(t.amount_local) as total
-            FROM transactions t
-            LEFT JOIN instruments i ON t.instrument_id = i.id
-            WHERE t.type = 'DIVIDEND'
-            GROUP BY symbol
-            ORDER BY total DESC
-        """, conn)
+    return _dividend_details(datetime.now().strftime('%Y'))
+
+@disk_cache('dividend_details')
+def _dividend_details(current_year: str):
+    # One scan of the dividend rows, summed per (year, instrument); the three views roll up from it.
+    # Labels come from the cached instrument map instead of a JOIN on every call.
+    conn = get_read_connection()
+    df = pd.read_sql_query("""
+        SELECT
+            substr(date, 1, 4) as year,
+            instrument_id,
+            SUM(amount_local) as total
+        FROM transactions
+        WHERE type = 'DIVIDEND'
+        GROUP BY 1, 2
+    """, conn)
+    df['symbol'] = df['instrument_id'].map(_instrument_labels(get_db_version()))
+    df = df.groupby(['year', 'symbol'], as_index=False, dropna=False)['total'].sum()
+
+    # 1. Yearly
+    df_yearly = df.groupby('year', as_index=False)['total'].sum().sort_values('year', ignore_index=True)
+
+    # 2. By Ticker (Current Year)
+    df_current_year = (df[df['year'] == current_year]
+                       .groupby('symbol', as_index=False, dropna=False)['total'].sum()
+                       .sort_values('total', ascending=False, ignore_index=True))
+
+    # 3. By Ticker (All Time)
+    df_all_time = (df.groupby('symbol', as_index=False, dropna=False)['total'].sum()
+                   .sort_values('total', ascending=False, ignore_index=True))
 
     return df_yearly, df_current_year, df_all_time
 
@@ -621,7 +757,7 @@ def get_dividend_forecast() -> Tuple[pd.DataFrame, Dict[str, Any]]:
             - ttm_count: Number of holdings using TTM fallback
             - no_data_count: Number of holdings with no dividend data
     """
-    holdings = get_holdings()
+    holdings = get_holdings_qty_only()
     if holdings.empty:
         return pd.DataFrame(), {'total_estimate_local': 0, 'yahoo_count': 0, 'ttm_count': 0, 'no_data_count': 0}
 
@@ -632,26 +768,26 @@ def get_dividend_forecast() -> Tuple[pd.DataFrame, Dict[str, Any]]:
     yahoo_dividends = get_forward_dividends(symbols)
 
     # Get TTM dividends from transaction history as fallback
-    with get_db_connection() as conn:
-        ttm_df = pd.read_sql_query("""
-            SELECT
-                i.symbol,
-                i.currency,
-                SUM(t.amount) as ttm_total,
-                COUNT(*) as num_payments
-            FROM transactions t
-            LEFT JOIN instruments i ON t.instrument_id = i.id
-            WHERE t.type = 'DIVIDEND'
-            AND t.date >= date('now', '-12 months')
-            GROUP BY t.instrument_id
-        """, conn)
+    conn = get_read_connection()
+    ttm_df = pd.read_sql_query("""
+        SELECT
+            i.symbol,
+            i.currency,
+            SUM(t.amount) as ttm_total,
+            COUNT(*) as num_payments
+        FROM transactions t
+        LEFT JOIN instruments i ON t.instrument_id = i.id
+        WHERE t.type = 'DIVIDEND'
+        AND t.date >= date('now', '-12 months')
+        GROUP BY t.instrument_id
+    """, conn)
 
     ttm_by_symbol = {row['symbol']: row for _, row in ttm_df.iterrows()}
 
     # Get instrument currencies from DB
-    with get_db_connection() as conn:
-        currencies_df = pd.read_sql_query(
-            "SELECT symbol, currency FROM instruments WHERE symbol IS NOT NULL", conn)
+    conn = get_read_connection()
+    currencies_df = pd.read_sql_query(
+        "SELECT symbol, currency FROM instruments WHERE symbol IS NOT NULL", conn)
     currency_map = dict(zip(currencies_df['symbol'], currencies_df['currency']))
 
     results = []
@@ -722,6 +858,19 @@ def get_dividend_forecast() -> Tuple[pd.DataFrame, Dict[str, Any]]:
     return df, summary
 
 
+def _yearly_currency_recent(df: pd.DataFrame, value_col: str, top_cols: List[str], limit: int = 50) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Rolls one scan of matching transactions (with a 'year' column) up into the
+    yearly totals, totals by currency and the most recent rows.
+    """
+    df_yearly = (df.groupby('year', as_index=False, dropna=False)[value_col].sum()
+                 .rename(columns={value_col: 'total'}).sort_values('year', ignore_index=True))
+    df_currency = (df.groupby('currency', as_index=False, dropna=False)[value_col].sum()
+                   .rename(columns={value_col: 'total'}).sort_values('total', ascending=False, ignore_index=True))
+    df_top = df.sort_values('date', ascending=False, kind='stable').head(limit)[top_cols].reset_index(drop=True)
+    return df_yearly, df_currency, df_top
+
+@disk_cache('interest_details')
 def get_interest_details():
     """
     Returns detailed interest data:
@@ -729,45 +878,23 @@ def get_interest_details():
     2. By Currency
     3. Top Payments
     """
-    with get_db_connection() as conn:
-        # 1. Yearly
-        df_yearly = pd.read_sql_query("""
-            SELECT
-                strftime('%Y', date) as year,
-                SUM(ABS(amount_local)) as total
-            FROM transactions
-            WHERE type = 'INTEREST'
-            GROUP BY year
-            ORDER BY year
-        """, conn)
-
-        # 2. By Currency
-        df_currency = pd.read_sql_query("""
-            SELECT
-                currency,
-                SUM(ABS(amount_local)) as total
-            FROM transactions
-            WHERE type = 'INTEREST'
-            GROUP BY currency
-            ORDER BY total DESC
-        """, conn)
-
-        # 3. Recent Payments
-        df_top = pd.read_sql_query("""
-            SELECT
-                date,
-                currency,
-                ABS(amount) as amount,
-                ABS(amount_local) as amount_local,
-                source_file
-            FROM transactions
-            WHERE type = 'INTEREST'
-            ORDER BY date DESC
-            LIMIT 50
-        """, conn)
+    # One scan of the interest rows; the three views roll up from it
+    conn = get_read_connection()
+    df = pd.read_sql_query("""
+        SELECT
+            substr(date, 1, 4) as year,
+            date,
+            currency,
+            ABS(amount) as amount,
+            ABS(amount_local) as amount_local,
+            source_file
+        FROM transactions
+        WHERE type = 'INTEREST'
+    """, conn)
 
-    return df_yearly, df_currency, df_top
+    return _yearly_currency_recent(df, 'amount_local', ['date', 'currency', 'amount', 'amount_local', 'source_file'])
 
+@disk_cache('fee_details')
 def get_fee_details():
     """
     Returns detailed fee data:
@@ -775,57 +902,62 @@ def get_fee_details():
     2. By Currency
     3. Top Payments
     """
-    with get_db_connection() as conn:
-        # 1. Yearly
-        df_yearly = pd.read_sql_query("""
-            SELECT
-                strftime('%Y', date) as year,
-                SUM(
-                    CASE
-                        WHEN type = 'FEE' THEN ABS(amount_local)
-                        ELSE fee_local
-                    END
-                ) as total
-            FROM transactions
-            WHERE type = 'FEE' OR fee_local > 0
-            GROUP BY year
-            ORDER BY year
-        """, conn)
-
-        # 2. By Currency
-        df_currency = pd.read_sql_query("""
-            SELECT
-                currency,
-                SUM(
-                    CASE
-                        WHEN type = 'FEE' THEN ABS(amount_local)
-                        ELSE fee_local
-                    END
-                ) as total
-            FROM transactions
-            WHERE type = 'FEE' OR fee_local > 0
-            GROUP BY currency
-            ORDER BY total DESC
-        """, conn)
-
-        # 3. Recent Fees
-        df_top = pd.read_sql_query("""
-            SELECT
-                date,
-                currency,
-                CASE
-                    WHEN type = 'FEE' THEN ABS(amount_local)
-                    ELSE fee_local
-                END as amount_local,
-                source_file
-            FROM transactions
-            WHERE type = 'FEE' OR fee_local > 0
-            ORDER BY date DESC
-            LIMIT 50
-        """, conn)
+    # One scan of the fee rows; the three views roll up from it
+    conn = get_read_connection()
+    df = pd.read_sql_query("""
+        SELECT
+            substr(date, 1, 4) as year,
+            date,
+            currency,
+            CASE
+                WHEN type = 'FEE' THEN ABS(amount_local)
+                ELSE fee_local
+            END as amount_local,
+            source_file
+        FROM transactions
+        WHERE type = 'FEE' OR fee_local > 0
+    """, conn)
 
-    return df_yearly, df_currency, df_top
+    return _yearly_currency_recent(df, 'amount_local', ['date', 'currency', 'amount_local', 'source_file'])
 
+def _replay_fx_inventory(qtys: np.ndarray, vals: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Average-cost inventory of one foreign currency.
+
+    Args:
+        qtys: Foreign amount per transaction (positive = inflow), in date order
+        vals: Base-currency amount per transaction
+
+    Returns:
+        (holdings, cost basis, realized P&L) after the last transaction.
+    """
+    holdings = 0.0; total_cost = 0.0; realized_pl = 0.0
+    for qty, abs_qty, val_nok, abs_val_nok in zip(qtys.tolist(), np.abs(qtys).tolist(), vals.tolist(), np.abs(vals).tolist()):
+        if qty > 0:
+            # BUY (Inflow of Foreign Currency)
+            holdings += qty
+            total_cost += val_nok
+
+        elif qty < 0:
+            # SELL (Outflow of Foreign Currency)
+            if holdings <= 0:
+                cost_portion = 0
+            else:
+                portion = min(abs_qty / holdings, 1.0)
+                cost_portion = total_cost * portion
+
+            realized_pl += abs_val_nok - cost_portion
+
+            # Update Inventory
+            holdings += qty
+            total_cost -= cost_portion
+
+            if abs(holdings) < 0.01:
+                holdings = 0
+                total_cost = 0
+    return holdings, total_cost, realized_pl
+
+@disk_cache('fx_performance')
 def get_fx_performance():
     """
     Calculates Realized P&L, Remaining Holdings, and Cost Basis for foreign currency.
@@ -845,53 +977,19 @@ def get_fx_performance():
         ORDER BY date, id
     """
 
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query(query, conn)
 
     if df.empty:
         return pd.DataFrame()
 
     results = []
 
-    # Process each currency
-    for currency, group in df.groupby('currency'):
-        holdings = 0.0
-        total_cost = 0.0
-        realized_pl = 0.0
-
-        # Sort just in case
-        group = group.sort_values('date')
-
-        for _, row in group.iterrows():
-            qty = row['quantity']
-            val_nok = row['amount_local']
-
-            if qty > 0:
-                # BUY (Inflow of Foreign Currency)
-                holdings += qty
-                total_cost += val_nok
-
-            elif qty < 0:
-                # SELL (Outflow of Foreign Currency)
-                if holdings <= 0:
-                    cost_portion = 0
-                else:
-                    portion = abs(qty) / holdings
-                    portion = min(portion, 1.0)
-                    cost_portion = total_cost * portion
-
-                proceeds = abs(val_nok)
-                gain = proceeds - cost_portion
-                realized_pl += gain
-
-                # Update Inventory
-                holdings += qty
-                total_cost -= cost_portion
-
-                if abs(holdings) < 0.01:
-                    holdings = 0
-                    total_cost = 0
-
+    # Process each currency (rows are already in date, id order)
+    qtys = df['quantity'].to_numpy(dtype=float)
+    vals = df['amount_local'].to_numpy(dtype=float)
+    for currency, rows in df.groupby('currency').indices.items():
+        holdings, total_cost, realized_pl = _replay_fx_inventory(qtys[rows], vals[rows])
         results.append({
             'currency': currency,
             'realized_pl_nok': realized_pl,
@@ -902,6 +1000,64 @@ def get_fx_performance():
     return pd.DataFrame(results)
 
 
+def _replay_security_fx(is_buy: np.ndarray, qtys: np.ndarray, foreign: np.ndarray, local: np.ndarray, rates: np.ndarray) -> Tuple[float, float, float, float]:
+    """
+    FX P&L replay of one foreign-currency instrument's BUY/SELL rows (date order).
+
+    Returns:
+        (qty, foreign cost, local cost, realized FX P&L) after the last row.
+    """
+    qty_h = 0.0; foreign_cost = 0.0; local_cost = 0.0; realized_fx_pl = 0.0
+    for buy, qty, abs_qty, foreign_amount, local_amount, exchange_rate in zip(is_buy.tolist(), qtys.tolist(), np.abs(qtys).tolist(), foreign.tolist(), local.tolist(), rates.tolist()):
+        if buy:
+            qty_h += qty
+            foreign_cost += foreign_amount
+            local_cost += local_amount
+
+        elif qty_h > 0:
+            # Calculate avg purchase rate
+            avg_purchase_rate = local_cost / foreign_cost if foreign_cost > 0 else exchange_rate
+
+            # FX P&L = foreign_proceeds × (sale_rate - avg_purchase_rate)
+            realized_fx_pl += foreign_amount * (exchange_rate - avg_purchase_rate)
+
+            # Reduce cost basis proportionally
+            portion = min(abs_qty / qty_h, 1.0)
+            qty_h += qty  # qty is negative for SELL
+            foreign_cost -= foreign_cost * portion
+            local_cost -= local_cost * portion
+
+            if abs(qty_h) < 0.001:
+                qty_h = 0
+                foreign_cost = 0
+                local_cost = 0
+    return qty_h, foreign_cost, local_cost, realized_fx_pl
+
+def _replay_cash_fx(amounts: np.ndarray, amounts_local: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Average-cost replay of one foreign cash balance (date order).
+
+    Returns:
+        (cash holdings, cash cost, realized P&L) after the last row.
+    """
+    cash_holdings = 0.0; cash_cost = 0.0; cash_realized_pl = 0.0
+    for amount, abs_amount, abs_amount_local in zip(amounts.tolist(), np.abs(amounts).tolist(), np.abs(amounts_local).tolist()):
+        if amount > 0:
+            cash_holdings += amount
+            cash_cost += abs_amount_local
+        elif amount < 0:
+            if cash_holdings > 0:
+                portion = min(abs_amount / cash_holdings, 1.0)
+                cost_portion = cash_cost * portion
+                cash_realized_pl += abs_amount_local - cost_portion
+                cash_cost -= cost_portion
+            cash_holdings += amount
+
+            if abs(cash_holdings) < 0.01:
+                cash_holdings = 0
+                cash_cost = 0
+    return cash_holdings, cash_cost, cash_realized_pl
+
 def get_fx_performance_detailed():
     """
     Comprehensive FX P&L calculation including both cash and securities.
@@ -914,195 +1070,126 @@ def get_fx_performance_detailed():
         currency, cash_holdings, realized_cash_pl, unrealized_cash_pl,
         realized_securities_pl, unrealized_securities_pl, total_realized_pl, total_unrealized_pl
     """
-    from kodak.shared.market_data import get_exchange_rate, get_latest_prices
+    from kodak.shared.market_data import get_exchange_rates_batch, get_latest_prices
 
     # Get all transactions, using instrument currency for securities
     # Note: t.currency is settlement currency, i.currency is trading currency
     query = f"""
         SELECT
             t.date, t.type, t.instrument_id, t.quantity, t.amount, t.currency,
-            t.exchange_rate, t.amount_local, i.symbol,
+            t.exchange_rate, t.amount_local, i.symbol, i.currency as instrument_currency,
             COALESCE(i.currency, t.currency) as effective_currency
         FROM transactions t
         LEFT JOIN instruments i ON t.instrument_id = i.id
         ORDER BY t.date, t.id
     """
 
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query(query, conn)
 
     if df.empty:
         return pd.DataFrame()
 
-    # Track state per currency (for cash - only non-security transactions)
-    currency_state = {}  # currency -> {cash_holdings, cash_cost, cash_realized_pl}
+    exchange_rate = df['exchange_rate'].fillna(1.0).to_numpy(dtype=float)
+    amount = df['amount'].to_numpy(dtype=float)
+    amount_local = df['amount_local'].to_numpy(dtype=float)
+    has_inst = df['instrument_id'].notna().to_numpy()
 
+    # --- Securities (BUY/SELL in a foreign instrument currency), replayed per instrument ---
     # Track state per instrument (for securities FX P&L)
     # We need: qty, foreign_cost_basis, local_cost_basis to compute avg_purchase_rate
     instrument_state = {}  # instrument_id -> {qty, foreign_cost, local_cost, currency, realized_fx_pl}
-
-    for _, row in df.iterrows():
-        txn_currency = row['currency']  # Settlement currency
-        effective_currency = row['effective_currency']  # Instrument currency or txn currency
-        inst_id = row['instrument_id']
-        amount = row['amount']
-        amount_local = row['amount_local']
-        exchange_rate = row['exchange_rate'] if pd.notna(row['exchange_rate']) else 1.0
-        t_type = row['type']
-        qty = row['quantity'] if pd.notna(row['quantity']) else 0
-
-        # --- Handle securities (BUY/SELL) ---
-        if pd.notna(inst_id) and t_type in ['BUY', 'SELL']:
-            # Use instrument's currency for FX exposure
-            security_currency = effective_currency
-
-            # Skip if security is in base currency (no FX exposure)
-            if security_currency == BASE_CURRENCY:
-                continue
-
-            if inst_id not in instrument_state:
-                instrument_state[inst_id] = {
-                    'qty': 0.0,
-                    'foreign_cost': 0.0,
-                    'local_cost': 0.0,
-                    'currency': security_currency,
-                    'realized_fx_pl': 0.0,
-                    'symbol': row['symbol']
-                }
-            ist = instrument_state[inst_id]
-
-            # Derive foreign amount from local amount and exchange rate
-            # If exchange_rate is stored, foreign = local / rate
-            # If txn_currency == security_currency, amount is already in foreign currency
-            if txn_currency == security_currency:
-                foreign_amount = abs(amount)
-            elif exchange_rate > 0:
-                foreign_amount = abs(amount_local) / exchange_rate
-            else:
-                foreign_amount = abs(amount_local)  # Fallback
-
-            local_amount = abs(amount_local)
-
-            if t_type == 'BUY':
-                ist['qty'] += qty
-                ist['foreign_cost'] += foreign_amount
-                ist['local_cost'] += local_amount
-
-            elif t_type == 'SELL' and ist['qty'] > 0:
-                # Calculate avg purchase rate
-                avg_purchase_rate = ist['local_cost'] / ist['foreign_cost'] if ist['foreign_cost'] > 0 else exchange_rate
-
-                # FX P&L = foreign_proceeds × (sale_rate - avg_purchase_rate)
-                fx_pl = foreign_amount * (exchange_rate - avg_purchase_rate)
-                ist['realized_fx_pl'] += fx_pl
-
-                # Reduce cost basis proportionally
-                portion = min(abs(qty) / ist['qty'], 1.0)
-                ist['qty'] += qty  # qty is negative for SELL
-                ist['foreign_cost'] -= ist['foreign_cost'] * portion
-                ist['local_cost'] -= ist['local_cost'] * portion
-
-                if abs(ist['qty']) < 0.001:
-                    ist['qty'] = 0
-                    ist['foreign_cost'] = 0
-                    ist['local_cost'] = 0
-
-        # --- Handle cash flows (non-security transactions only) ---
-        elif pd.isna(inst_id) and txn_currency != BASE_CURRENCY:
-            if txn_currency not in currency_state:
-                currency_state[txn_currency] = {
-                    'cash_holdings': 0.0,
-                    'cash_cost': 0.0,
-                    'cash_realized_pl': 0.0
-                }
-            cs = currency_state[txn_currency]
-
-            if amount > 0:
-                cs['cash_holdings'] += amount
-                cs['cash_cost'] += abs(amount_local)
-            elif amount < 0:
-                if cs['cash_holdings'] > 0:
-                    portion = min(abs(amount) / cs['cash_holdings'], 1.0)
-                    cost_portion = cs['cash_cost'] * portion
-                    proceeds_local = abs(amount_local)
-                    cs['cash_realized_pl'] += proceeds_local - cost_portion
-                    cs['cash_cost'] -= cost_portion
-                cs['cash_holdings'] += amount
-
-                if abs(cs['cash_holdings']) < 0.01:
-                    cs['cash_holdings'] = 0
-                    cs['cash_cost'] = 0
+    is_sec = has_inst & df['type'].isin(['BUY', 'SELL']).to_numpy() & (df['effective_currency'] != BASE_CURRENCY).to_numpy()
+    # Derive foreign amount from local amount and exchange rate
+    # If txn_currency == security_currency, amount is already in foreign currency
+    # If exchange_rate is stored, foreign = local / rate (else fall back to local)
+    same_ccy = (df['currency'] == df['effective_currency']).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        foreign_amount = np.where(same_ccy, np.abs(amount), np.where(exchange_rate > 0, np.abs(amount_local) / exchange_rate, np.abs(amount_local)))
+    sec = df[is_sec]
+    is_buy = (sec['type'] == 'BUY').to_numpy()
+    sec_qty = sec['quantity'].fillna(0).to_numpy(dtype=float)
+    sec_foreign = foreign_amount[is_sec]; sec_local = np.abs(amount_local[is_sec]); sec_rate = exchange_rate[is_sec]
+    for inst_id, rows in sec.groupby('instrument_id', sort=False).indices.items():
+        qty_h, foreign_cost, local_cost, realized_fx_pl = _replay_security_fx(is_buy[rows], sec_qty[rows], sec_foreign[rows], sec_local[rows], sec_rate[rows])
+        first = rows[0]
+        instrument_state[inst_id] = {
+            'qty': qty_h,
+            'foreign_cost': foreign_cost,
+            'local_cost': local_cost,
+            'currency': sec['effective_currency'].iat[first],
+            'realized_fx_pl': realized_fx_pl,
+            'symbol': sec['symbol'].iat[first]
+        }
+
+    # --- Cash flows (non-security transactions only), replayed per settlement currency ---
+    currency_state = {}  # currency -> {cash_holdings, cash_cost, cash_realized_pl}
+    is_cash = ~has_inst & (df['currency'] != BASE_CURRENCY).to_numpy()
+    cash = df[is_cash]
+    cash_amount = amount[is_cash]; cash_local = amount_local[is_cash]
+    for currency, rows in cash.groupby('currency', sort=False, dropna=False).indices.items():
+        cash_holdings, cash_cost, cash_realized_pl = _replay_cash_fx(cash_amount[rows], cash_local[rows])
+        currency_state[currency] = {
+            'cash_holdings': cash_holdings,
+            'cash_cost': cash_cost,
+            'cash_realized_pl': cash_realized_pl
+        }
 
     # --- Calculate unrealized FX P&L for current holdings ---
-    holdings_df = get_holdings()
+    holdings_df = get_holdings_qty_only()
     inst_currency_map = {}
     prices = {}
 
     if not holdings_df.empty:
-        with get_db_connection() as conn:
-            inst_currencies = pd.read_sql_query("SELECT id, currency FROM instruments", conn)
-        inst_currency_map = dict(zip(inst_currencies['id'], inst_currencies['currency']))
+        # The ledger query already joined instruments: no second round trip for their currencies
+        inst_rows = df[has_inst].drop_duplicates('instrument_id')
+        inst_currency_map = dict(zip(inst_rows['instrument_id'], inst_rows['instrument_currency']))
         prices = get_latest_prices(holdings_df['instrument_id'].tolist())
 
-    # Build results per currency
-    all_currencies = set(currency_state.keys())
-    for ist in instrument_state.values():
-        all_currencies.add(ist['currency'])
-
-    results = []
-    for currency in sorted(all_currencies):
-        cs = currency_state.get(currency, {'cash_holdings': 0, 'cash_cost': 0, 'cash_realized_pl': 0})
-        current_rate = get_exchange_rate(currency, BASE_CURRENCY)
-
-        # Realized FX P&L from securities
-        realized_securities_pl = sum(
-            ist['realized_fx_pl'] for ist in instrument_state.values() if ist['currency'] == currency
-        )
-
-        # Unrealized FX P&L from current holdings
-        unrealized_securities_pl = 0.0
-        if not holdings_df.empty:
-            for _, h_row in holdings_df.iterrows():
-                inst_id = h_row['instrument_id']
-                if inst_currency_map.get(inst_id) != currency:
-                    continue
-                if inst_id not in instrument_state:
-                    continue
-
-                ist = instrument_state[inst_id]
-                if ist['qty'] <= 0 or ist['foreign_cost'] <= 0:
-                    continue
-
-                # Get current market value in foreign currency
-                price_info = prices.get(inst_id)
-                if price_info:
-                    current_price, _ = price_info
-                    current_foreign_value = h_row['quantity'] * current_price
-                    avg_purchase_rate = ist['local_cost'] / ist['foreign_cost']
-
-                    # Unrealized FX P&L = current_foreign_value × (current_rate - avg_purchase_rate)
-                    unrealized_securities_pl += current_foreign_value * (current_rate - avg_purchase_rate)
-
-        # Unrealized cash P&L
-        unrealized_cash_pl = 0.0
-        if cs['cash_holdings'] > 1.0 and cs['cash_cost'] > 0:
-            current_value = cs['cash_holdings'] * current_rate
-            unrealized_cash_pl = current_value - cs['cash_cost']
-
-        results.append({
-            'currency': currency,
-            'cash_holdings': cs['cash_holdings'],
-            'realized_cash_pl': cs['cash_realized_pl'],
-            'unrealized_cash_pl': unrealized_cash_pl,
-            'realized_securities_pl': realized_securities_pl,
-            'unrealized_securities_pl': unrealized_securities_pl,
-            'total_realized_pl': cs['cash_realized_pl'] + realized_securities_pl,
-            'total_unrealized_pl': unrealized_cash_pl + unrealized_securities_pl
-        })
+    ist_df = pd.DataFrame.from_dict(instrument_state, orient='index', columns=['qty', 'foreign_cost', 'local_cost', 'currency', 'realized_fx_pl', 'symbol'])
+    cs_df = pd.DataFrame.from_dict(currency_state, orient='index', columns=['cash_holdings', 'cash_cost', 'cash_realized_pl'])
 
-    return pd.DataFrame(results)
+    # Results are keyed on one sorted currency index; per-currency figures are reindexed onto it
+    all_ccy = pd.Index(sorted(set(currency_state).union(ist_df['currency'].unique())), name='currency')
+    if all_ccy.empty:
+        return pd.DataFrame()
+    current_rates = pd.Series(get_exchange_rates_batch(all_ccy.tolist(), BASE_CURRENCY)).reindex(all_ccy)
+    cs_df = cs_df.reindex(all_ccy, fill_value=0.0)
 
+    # Realized FX P&L from securities
+    realized_securities_pl = ist_df.groupby('currency')['realized_fx_pl'].sum().reindex(all_ccy, fill_value=0.0)
 
+    # Unrealized FX P&L = current_foreign_value × (current_rate - avg_purchase_rate), over priced holdings
+    unrealized_securities_pl = pd.Series(0.0, index=all_ccy)
+    if not holdings_df.empty:
+        held = holdings_df[['instrument_id', 'quantity']].join(ist_df, on='instrument_id', how='inner')
+        held = held[(held['qty'] > 0) & (held['foreign_cost'] > 0)]
+        price = held['instrument_id'].map({k: v[0] for k, v in prices.items() if v})
+        held = held.assign(ccy=held['instrument_id'].map(inst_currency_map), price=price).dropna(subset=['price'])
+        if not held.empty:
+            held['current_rate'] = held['ccy'].map(current_rates)
+            held['fx_contrib'] = (held['quantity'] * held['price']) * (held['current_rate'] - held['local_cost'] / held['foreign_cost'])
+            agg = held.groupby('ccy').agg(unrealized_securities_pl=('fx_contrib', 'sum'))
+            unrealized_securities_pl = agg['unrealized_securities_pl'].reindex(all_ccy, fill_value=0.0)
+
+    # Unrealized cash P&L
+    has_cash = (cs_df['cash_holdings'] > 1.0) & (cs_df['cash_cost'] > 0)
+    unrealized_cash_pl = (cs_df['cash_holdings'] * current_rates - cs_df['cash_cost']).where(has_cash, 0.0)
+
+    results = pd.DataFrame({
+        'cash_holdings': cs_df['cash_holdings'],
+        'realized_cash_pl': cs_df['cash_realized_pl'],
+        'unrealized_cash_pl': unrealized_cash_pl,
+        'realized_securities_pl': realized_securities_pl,
+        'unrealized_securities_pl': unrealized_securities_pl,
+        'total_realized_pl': cs_df['cash_realized_pl'] + realized_securities_pl,
+        'total_unrealized_pl': unrealized_cash_pl + unrealized_securities_pl,
+    }, index=all_ccy)
+
+    return results.reset_index()
+
+
+@disk_cache('realized_performance')
 def get_realized_performance():
     """
     Replays the ledger to calculate Realized Gains, Dividends, Fees, etc. by Year.
@@ -1117,112 +1204,113 @@ def get_realized_performance():
         LEFT JOIN instruments i ON t.instrument_id = i.id
         ORDER BY t.date, t.id
     '''
-    with get_db_connection() as conn:
-        df = pd.read_sql_query(query, conn)
+    conn = get_read_connection()
+    df = pd.read_sql_query(query, conn)
 
     if df.empty:
         return pd.DataFrame()
 
-    # State
+    df['year'] = df['date'].astype(str).str.slice(0, 4)
+    df['fee_local'] = df['fee_local'].fillna(0.0)
+
+    # 1. Income / Costs: purely additive per year, no replay needed
+    income = df[df['type'].isin(['DIVIDEND', 'INTEREST', 'TAX'])].pivot_table(
+        index='year', columns='type', values='amount_local', aggfunc='sum'
+    )
+    # Transaction fees plus explicit FEE transactions (fees are negative impact)
+    is_fee = df['type'] == 'FEE'
+    fee_rows = (df['fee_local'] > 0) | is_fee
+    fee_impact = -(df['fee_local'].where(df['fee_local'] > 0, 0.0) + df['amount_local'].abs().where(is_fee, 0.0))
+    fees = fee_impact[fee_rows].groupby(df.loc[fee_rows, 'year']).sum()
+
+    # 2. Capital Gains (Buy/Sell)
+    # Only rows that change an instrument's inventory need the sequential replay
+    types = df['type']
+    inventory = df[df['instrument_id'].notna() & (
+        types.isin(REALIZED_INFLOW_TYPES | REALIZED_OUTFLOW_TYPES)
+        | types.isin(['BYTTE UTTAK VP', 'BYTTE INNLEGG VP'])
+    )]
+    inv_types = inventory['type']
+    is_inflow = inv_types.isin(REALIZED_INFLOW_TYPES).to_numpy().tolist()
+    is_outflow = inv_types.isin(REALIZED_OUTFLOW_TYPES).to_numpy().tolist()
+    is_realized = inv_types.isin(REALIZED_SELL_TYPES).to_numpy().tolist()
+
     holdings = {} # inst_id -> {qty, total_cost}
-    yearly = {}   # year -> {realized_gl, dividends, interest, fees, tax}
-
-    def get_year(date_str):
-        return str(date_str)[:4]
-
-    def add_stat(year, category, value):
-        if year not in yearly:
-            yearly[year] = {'realized_gl': 0.0, 'dividends': 0.0, 'interest': 0.0, 'fees': 0.0, 'tax': 0.0}
-        yearly[year][category] += value
-
-    # Replay
-    for _, row in df.iterrows():
-        year = get_year(row['date'])
-        t_type = row['type']
-        inst_id = row['instrument_id']
-        qty = row['quantity']
-        amt = row['amount_local']
-        fee = row['fee_local'] if pd.notna(row['fee_local']) else 0.0
-
-        # Always track fees
-        if fee > 0:
-            add_stat(year, 'fees', -abs(fee)) # fees are negative impact
-
-        # 1. Income / Costs
-        if t_type == 'DIVIDEND':
-            add_stat(year, 'dividends', amt)
-        elif t_type == 'INTEREST':
-            add_stat(year, 'interest', amt) # usually negative
-        elif t_type == 'TAX':
-            add_stat(year, 'tax', amt)      # usually negative
-        elif t_type == 'FEE':
-            add_stat(year, 'fees', -abs(amt)) # Explicit fee transaction
-
-        # 2. Capital Gains (Buy/Sell)
-        # Only process if instrument is involved
-        if inst_id:
-            if inst_id not in holdings:
-                holdings[inst_id] = {'qty': 0.0, 'cost': 0.0}
-
-            h = holdings[inst_id]
-
-            # Identify Buy vs Sell using logic similar to get_holdings
-            
-            # Special handling for Splits (BYTTE)
-            if t_type == 'BYTTE UTTAK VP':
-                # Remove Quantity, KEEP Cost (deferred to new shares)
-                h['qty'] += qty # negative
-                continue
-            
-            if t_type == 'BYTTE INNLEGG VP':
-                # Add Quantity, Add any extra cost (usually 0)
-                h['qty'] += qty
-                h['cost'] += abs(amt)
-                continue
-
-            # INFLOW (Buy)
-            if t_type in ['BUY', 'DEPOSIT', 'TRANSFER_IN', 'TILDELING INNLEGG RE', 'EMISJON INNLEGG VP']:
-                # Add to inventory
-                h['qty'] += qty
-                # Cost increases by amount paid (usually negative amount, so we take abs)
-                cost_added = abs(amt)
-                h['cost'] += cost_added
-
-            # OUTFLOW (Sell)
-            elif t_type in ['SELL', 'WITHDRAWAL', 'TRANSFER_OUT', 'INNLØSN. UTTAK VP']:
-                # Calculate Realized Gain
-                # Avg Cost Basis
-                if h['qty'] > 0:
-                    avg_cost = h['cost'] / h['qty']
-                    cost_of_sold = avg_cost * abs(qty)
-
-                    # Proceeds = Amount received (positive for sell)
-                    proceeds = abs(amt)
-
-                    # Gain = Proceeds - Cost
-                    if t_type in ['SELL', 'INNLØSN. UTTAK VP', 'BYTTE UTTAK VP']:
-                        gain = proceeds - cost_of_sold
-                        add_stat(year, 'realized_gl', gain)
-
-                    # Reduce Inventory
-                    h['cost'] -= cost_of_sold
-
-                h['qty'] += qty # qty is negative
-
-                # Cleanup dust
-                if abs(h['qty']) < 0.001:
-                    h['qty'] = 0.0
-                    h['cost'] = 0.0
-
-    # Convert to DataFrame
-    data = []
-    for year, stats in yearly.items():
-        row = stats.copy()
-        row['year'] = year
-        row['total_pl'] = sum(stats.values())
-        data.append(row)
-
-    if not data:
+    realized = defaultdict(float)  # year -> realized_gl
+
+    # abs() is taken once per column up front instead of per row
+    inventory = inventory.assign(abs_qty=inventory['quantity'].abs(), abs_amt=inventory['amount_local'].abs())
+    for i, (year, t_type, inst_id, qty, abs_qty, abs_amt) in enumerate(inventory[
+        ['year', 'type', 'instrument_id', 'quantity', 'abs_qty', 'abs_amt']
+    ].itertuples(index=False, name=None)):
+        if not inst_id:
+            continue
+        if inst_id not in holdings:
+            holdings[inst_id] = {'qty': 0.0, 'cost': 0.0}
+
+        h = holdings[inst_id]
+
+        # Identify Buy vs Sell using logic similar to get_holdings
+
+        # Special handling for Splits (BYTTE)
+        if t_type == 'BYTTE UTTAK VP':
+            # Remove Quantity, KEEP Cost (deferred to new shares)
+            h['qty'] += qty # negative
+            continue
+
+        if t_type == 'BYTTE INNLEGG VP':
+            # Add Quantity, Add any extra cost (usually 0)
+            h['qty'] += qty
+            h['cost'] += abs_amt
+            continue
+
+        # INFLOW (Buy)
+        if is_inflow[i]:
+            # Add to inventory
+            h['qty'] += qty
+            # Cost increases by amount paid (usually negative amount, so we take abs)
+            cost_added = abs_amt
+            h['cost'] += cost_added
+
+        # OUTFLOW (Sell)
+        elif is_outflow[i]:
+            # Calculate Realized Gain
+            # Avg Cost Basis
+            if h['qty'] > 0:
+                avg_cost = h['cost'] / h['qty']
+                cost_of_sold = avg_cost * abs_qty
+
+                # Proceeds = Amount received (positive for sell)
+                proceeds = abs_amt
+
+                # Gain = Proceeds - Cost
+                if is_realized[i]:
+                    gain = proceeds - cost_of_sold
+                    realized[year] += gain
+
+                # Reduce Inventory
+                h['cost'] -= cost_of_sold
+
+            h['qty'] += qty # qty is negative
+
+            # Cleanup dust
+            if abs(h['qty']) < 0.001:
+                h['qty'] = 0.0
+                h['cost'] = 0.0
+
+    # Convert to DataFrame (one row per year that saw any activity)
+    result = pd.DataFrame({
+        'realized_gl': pd.Series(realized, dtype=float),
+        'dividends': income.get('DIVIDEND'),
+        'interest': income.get('INTEREST'),
+        'fees': fees,
+        'tax': income.get('TAX'),
+    })
+
+    if result.empty:
         return pd.DataFrame()
-        
-    return pd.DataFrame(data).sort_values('year')
+
+    result = result.fillna(0.0)
+    result['total_pl'] = result.sum(axis=1)
+    result = result.rename_axis('year').reset_index()
+    return result[['realized_gl', 'dividends', 'interest', 'fees', 'tax', 'year', 'total_pl']].sort_values('year')
@@ -1,13 +1,18 @@
+import functools
+import hashlib
+import pickle
 import sqlite3
 import os
 import logging
-import shutil
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Generator
+from typing import List, Dict, Any, Optional, Generator, Tuple, Callable
 
 # --- Configuration ---
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'database', 'portfolio.db')
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'project_kodak')
 
 def get_connection() -> sqlite3.Connection:
     """Establishes a connection to the SQLite database with Row factory enabled."""
@@ -16,8 +21,94 @@ def get_connection() -> sqlite3.Connection:
 
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # Access columns by name
+    # WAL lets readers run alongside a writer and makes commits cheap; NORMAL sync is
+    # durable-enough (no corruption risk) in WAL mode
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # read pages straight from a 256 MB mapping
     return conn
 
+_thread_local = threading.local()
+
+def get_read_connection() -> sqlite3.Connection:
+    """
+    Returns this thread's long-lived read-only connection, opening it on first use.
+
+    Saves the connect + PRAGMA setup on short, frequent lookups (e.g. market data).
+    Do not close it; writes go through get_db_connection().
+    """
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is None or _thread_local.path != DB_PATH:
+        conn = get_connection()
+        conn.execute("PRAGMA query_only=1")
+        _thread_local.conn, _thread_local.path = conn, DB_PATH
+    return conn
+
+def get_db_version() -> Tuple[int, ...]:
+    """
+    Returns a cheap change token for the database (mtime and size of the DB and its WAL).
+
+    Use it as part of a cache key for data derived from the DB, so cached results
+    are rebuilt after any write.
+    """
+    parts = []
+    for path in (DB_PATH, DB_PATH + '-wal'):
+        try:
+            st = os.stat(path)
+            parts.extend((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            parts.extend((0, 0))
+    return tuple(parts)
+
+def disk_cache(name: str, max_age: Optional[float] = None) -> Callable:
+    """
+    Persists a function's results across processes (e.g. repeated CLI runs) in CACHE_DIR.
+
+    Entries are keyed by (name, get_db_version(), args), so any DB write invalidates
+    them; max_age (seconds) additionally expires results that depend on live data.
+    Empty results are not stored. Cache I/O problems never fail the call.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                version = hashlib.sha256(repr(get_db_version()).encode()).hexdigest()[:16]
+                key = hashlib.sha256(pickle.dumps((args, sorted(kwargs.items())))).hexdigest()[:32]
+                prefix = f"{name}-{version}-"
+                path = os.path.join(CACHE_DIR, f"{prefix}{key}.pkl")
+            except Exception as e:  # e.g. unpicklable arguments: just call through
+                logging.debug(f"Disk cache key failed for {name}: {e}")
+                return func(*args, **kwargs)
+
+            if os.path.exists(path) and (max_age is None or time.time() - os.path.getmtime(path) < max_age):
+                try:
+                    with open(path, 'rb') as f:
+                        return pickle.load(f)
+                except Exception as e:
+                    logging.debug(f"Disk cache read failed for {name}: {e}")
+
+            result = func(*args, **kwargs)
+            if hasattr(result, '__len__') and len(result) == 0:
+                return result
+
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                # Entries for this name from a previous DB version can never hit again
+                for old in os.listdir(CACHE_DIR):
+                    if old.startswith(f"{name}-") and not old.startswith(prefix) and old.endswith('.pkl'):
+                        os.remove(os.path.join(CACHE_DIR, old))
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(result, f)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logging.debug(f"Disk cache write failed for {name}: {e}")
+            return result
+        return wrapper
+    return decorator
+
 @contextmanager
 def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
     """Context manager for database connections. Ensures proper cleanup."""
@@ -36,7 +127,14 @@ def create_backup(label: str = "manual") -> str:
     backup_path = os.path.join(backup_dir, f"portfolio_{label}_{timestamp}.db")
     
     try:
-        shutil.copy2(DB_PATH, backup_path)
+        # Use SQLite's online backup so committed pages still in the WAL file are included
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(backup_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
         logging.info(f"Backup created: {backup_path}")
         return backup_path
     except Exception as e:
@@ -1,24 +1,61 @@
+import functools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
-from kodak.shared.db import get_connection, get_db_connection, execute_batch, execute_query
+from kodak.shared.db import get_db_connection, get_read_connection, get_db_version, execute_batch, disk_cache
 
 logger = logging.getLogger(__name__)
 
-def get_latest_prices(instrument_ids: List[int]) -> Dict[int, Tuple[float, str]]:
+# Latest prices are reused within a run: {(db_version, frozenset(instrument_ids)): (fetched_at, {id: (price, currency)})}
+PRICE_CACHE_TTL = timedelta(hours=1)
+_PRICE_CACHE: Dict[Tuple[Tuple, frozenset], Tuple[datetime, Dict[int, Tuple[float, str]]]] = {}
+_PRICE_CACHE_LOCK = threading.Lock()
+
+def get_latest_prices(instrument_ids: List[int], refresh: bool = False) -> Dict[int, Tuple[float, str]]:
     """
     Fetches latest price. Returns {id: (price, currency)}.
+    Results are cached in-process for PRICE_CACHE_TTL per set of instrument ids, until
+    the database changes. Pass refresh=True to always download (e.g. before storing prices).
     """
-    conn = get_connection()
+    ids = frozenset(instrument_ids)
+    if refresh:
+        # Skip the on-disk copy too: a refresh must never store quotes another run fetched earlier
+        return _download_latest_prices(sorted(ids))
+
+    key = (get_db_version(), ids)
+    with _PRICE_CACHE_LOCK:
+        cached = _PRICE_CACHE.get(key)
+    if cached and datetime.now() - cached[0] < PRICE_CACHE_TTL:
+        return dict(cached[1])
+
+    results = _fetch_latest_prices(sorted(ids))
+    if results:
+        now = datetime.now()
+        with _PRICE_CACHE_LOCK:
+            # Entries from an older DB version or past their TTL can never be served again
+            for old in [k for k, (fetched_at, _) in _PRICE_CACHE.items() if k[0] != key[0] or now - fetched_at >= PRICE_CACHE_TTL]:
+                del _PRICE_CACHE[old]
+            _PRICE_CACHE[key] = (now, dict(results))
+    return results
+
+@disk_cache('latest_prices', max_age=PRICE_CACHE_TTL.total_seconds())
+def _fetch_latest_prices(instrument_ids: List[int]) -> Dict[int, Tuple[float, str]]:
+    """_download_latest_prices, kept on disk for PRICE_CACHE_TTL across runs."""
+    return _download_latest_prices(instrument_ids)
+
+def _download_latest_prices(instrument_ids: List[int]) -> Dict[int, Tuple[float, str]]:
+    """Downloads latest prices from Yahoo Finance."""
     placeholders = ','.join(['?'] * len(instrument_ids))
     
     # Get Symbol AND Currency from Instruments
     query = f"SELECT id, symbol, currency FROM instruments WHERE id IN ({placeholders})"
-    rows = execute_query(query, tuple(instrument_ids))
+    rows = get_read_connection().execute(query, tuple(instrument_ids)).fetchall()
     
-    id_map = {row['symbol']: {'id': row['id'], 'currency': row['currency']} for row in rows if row['symbol']}
+    id_map = {symbol: {'id': inst_id, 'currency': currency} for inst_id, symbol, currency in rows if symbol}
     symbols = list(id_map.keys())
     
     if not symbols:
@@ -31,26 +68,18 @@ def get_latest_prices(instrument_ids: List[int]) -> Dict[int, Tuple[float, str]]
         logger.error(f"Error fetching data: {e}")
         return {}
 
-    results = {}
-    
-    # Helper to safe get
-    def get_val(sym):
-        if isinstance(data, pd.Series):
-             return float(data.dropna().iloc[-1]) if not data.dropna().empty else 0.0
-        if sym in data.columns:
-             series = data[sym].dropna()
-             if not series.empty:
-                 return float(series.iloc[-1])
-        return 0.0
-
-    for symbol in symbols:
-        price = get_val(symbol)
-        if price > 0:
-            meta = id_map[symbol]
-            # Use the currency from our DB, as Yahoo doesn't reliably return it in simple download
-            results[meta['id']] = (price, meta['currency'])
+    # A single symbol may come back as a Series
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name=symbols[0])
 
-    return results
+    # Last valid close of every symbol in one pass
+    last_prices = data.ffill().iloc[-1] if not data.empty else pd.Series(dtype=float)
+
+    # Use the currency from our DB, as Yahoo doesn't reliably return it in simple download
+    return {
+        id_map[s]['id']: (float(last_prices[s]), id_map[s]['currency'])
+        for s in symbols if s in last_prices.index and last_prices[s] > 0
+    }
 
 def store_prices(prices: Dict[int, Tuple[float, str]], date_str: str = None):
     if not date_str:
@@ -72,29 +101,40 @@ def get_exchange_rate(from_curr: str, to_curr: str) -> float:
     1. Checks database for recent rate (last 7 days)
     2. Falls back to Yahoo Finance if not found
     3. Stores fetched rate in database for future use
+    Successful lookups are also memoized in-process for the rest of the day.
     """
     if not from_curr or not to_curr or from_curr == to_curr:
         return 1.0
 
-    today = datetime.now().strftime('%Y-%m-%d')
+    try:
+        return _cached_exchange_rate(from_curr, to_curr, datetime.now().strftime('%Y-%m-%d'))
+    except LookupError:
+        pair = f"{from_curr}{to_curr}=X"
+        logger.warning(f"Could not fetch rate for {pair}. Using 1.0")
+        return 1.0
 
+
+@functools.lru_cache(maxsize=256)
+def _cached_exchange_rate(from_curr: str, to_curr: str, today: str) -> float:
+    """
+    Looks up one rate (DB, then Yahoo Finance). Keyed on today's date so entries
+    expire when the date rolls over; raises LookupError on failure so the 1.0
+    fallback is never cached.
+    """
     # 1. Try database first (recent rate within 7 days)
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT rate, date FROM exchange_rates
-            WHERE from_currency = ? AND to_currency = ?
-            ORDER BY date DESC LIMIT 1
-        """, (from_curr, to_curr))
-        row = cursor.fetchone()
-
-        if row:
-            rate, rate_date = row
-            # Use if from today or recent (within 7 days for weekends/holidays)
-            days_old = (datetime.now() - datetime.strptime(rate_date, '%Y-%m-%d')).days
-            if days_old <= 7 and rate > 0:
-                logger.debug(f"Using cached rate {from_curr}/{to_curr}: {rate} (from {rate_date})")
-                return float(rate)
+    row = get_read_connection().execute("""
+        SELECT rate, date FROM exchange_rates
+        WHERE from_currency = ? AND to_currency = ?
+        ORDER BY date DESC LIMIT 1
+    """, (from_curr, to_curr)).fetchone()
+
+    if row:
+        rate, rate_date = row
+        # Use if from today or recent (within 7 days for weekends/holidays)
+        days_old = (datetime.now() - datetime.strptime(rate_date, '%Y-%m-%d')).days
+        if days_old <= 7 and rate > 0:
+            logger.debug(f"Using cached rate {from_curr}/{to_curr}: {rate} (from {rate_date})")
+            return float(rate)
 
     # 2. Fetch from Yahoo Finance
     pair = f"{from_curr}{to_curr}=X"
@@ -109,8 +149,40 @@ def get_exchange_rate(from_curr: str, to_curr: str) -> float:
     except Exception as e:
         logger.warning(f"Failed to fetch exchange rate for {pair}: {e}")
 
-    logger.warning(f"Could not fetch rate for {pair}. Using 1.0")
-    return 1.0
+    raise LookupError(pair)
+
+
+def get_exchange_rates_batch(from_currencies: List[str], to_curr: str) -> Dict[str, float]:
+    """
+    get_exchange_rate for several currencies: cached rates (last 7 days) come
+    from a single query, and only the misses go to Yahoo Finance.
+    Returns {from_currency: rate}.
+    """
+    rates = {c: 1.0 for c in from_currencies if not c or not to_curr or c == to_curr}
+    wanted = [c for c in dict.fromkeys(from_currencies) if c not in rates]
+    if not wanted:
+        return rates
+
+    query = f"""
+        SELECT from_currency, rate, date FROM (
+            SELECT from_currency, rate, date,
+                   ROW_NUMBER() OVER (PARTITION BY from_currency ORDER BY date DESC) AS rn
+            FROM exchange_rates
+            WHERE to_currency = ? AND from_currency IN ({','.join('?' * len(wanted))})
+        ) AS latest WHERE rn = 1
+    """
+    rows = get_read_connection().execute(query, (to_curr, *wanted)).fetchall()
+
+    now = datetime.now()
+    for from_curr, rate, rate_date in rows:
+        # Use if from today or recent (within 7 days for weekends/holidays)
+        if (now - datetime.strptime(rate_date, '%Y-%m-%d')).days <= 7 and rate > 0:
+            rates[from_curr] = float(rate)
+
+    for from_curr in wanted:
+        if from_curr not in rates:
+            rates[from_curr] = get_exchange_rate(from_curr, to_curr)
+    return rates
 
 
 def _store_exchange_rate(from_curr: str, to_curr: str, date: str, rate: float):
@@ -169,6 +241,60 @@ def get_historical_prices_by_date(symbols: List[str], target_date: str) -> Dict[
             logger.debug(f"Could not extract price for {sym}: {e}")
     return results
 
+def get_historical_prices_by_dates(symbols: List[str], target_dates: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Batched get_historical_prices_by_date: one download covering every target date.
+    Returns {target_date: {symbol: price}}, each price being the last close in the
+    same 7-day window on or before that date.
+    """
+    results = {d: {} for d in target_dates}
+    if not symbols or not target_dates:
+        return results
+
+    end_dt = max(pd.Timestamp(d) for d in target_dates) + pd.Timedelta(days=1)
+    start_dt = min(pd.Timestamp(d) for d in target_dates) + pd.Timedelta(days=1) - pd.Timedelta(days=7)
+
+    logger.info(f"Fetching historical prices for {len(symbols)} symbols around {len(target_dates)} dates...")
+
+    try:
+        # auto_adjust=False for the same reason as get_historical_prices_by_date
+        df = yf.download(symbols, start=start_dt, end=end_dt, progress=False, group_by='ticker', auto_adjust=False)
+    except Exception as e:
+        logger.error(f"Error fetching historical data: {e}")
+        return results
+
+    for sym in symbols:
+        try:
+            if len(symbols) > 1:
+                if sym not in df.columns:
+                    continue
+                data = df[sym]['Close']
+            else:
+                data = df['Close']
+            valid_data = data.dropna()
+        except Exception as e:
+            logger.debug(f"Could not extract price for {sym}: {e}")
+            continue
+
+        for d in target_dates:
+            # Same window as a single-date fetch: (date - 6 days) .. date
+            day = pd.Timestamp(d)
+            window = valid_data[(valid_data.index >= day - pd.Timedelta(days=6)) & (valid_data.index < day + pd.Timedelta(days=1))]
+            if not window.empty:
+                results[d][sym] = float(window.iloc[-1])
+    return results
+
+# Yahoo lookups are independent network round-trips: fan them out over threads
+MAX_FETCH_WORKERS = 16
+
+def _fetch_splits(sym: str) -> Tuple[str, pd.Series]:
+    """Fetches one symbol's split history; returns (symbol, None) on failure."""
+    try:
+        return sym, yf.Ticker(sym).splits
+    except Exception as e:
+        logger.debug(f"Could not fetch split history for {sym}: {e}")
+        return sym, None
+
 def get_split_history(symbols: List[str]) -> Dict[str, pd.Series]:
     """
     Fetches split history for a list of symbols.
@@ -176,22 +302,43 @@ def get_split_history(symbols: List[str]) -> Dict[str, pd.Series]:
     """
     if not symbols:
         return {}
-        
+
     logger.info(f"Fetching split history for {len(symbols)} symbols...")
     results = {}
-    
-    for sym in symbols:
-        try:
-            ticker = yf.Ticker(sym)
-            splits = ticker.splits
-            if not splits.empty:
+
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(symbols))) as ex:
+        for sym, splits in ex.map(_fetch_splits, symbols):
+            if splits is not None and not splits.empty:
                 results[sym] = splits
-        except Exception as e:
-            logger.debug(f"Could not fetch split history for {sym}: {e}")
 
     return results
 
 
+def _fetch_forward_dividend(sym: str) -> Tuple[str, Dict]:
+    """Fetches one symbol's forward dividend info; returns (symbol, None) if unavailable."""
+    try:
+        info = yf.Ticker(sym).info
+
+        dividend_rate = info.get('dividendRate')
+        dividend_yield = info.get('dividendYield')
+        currency = info.get('currency')
+
+        # Only include if we have a valid dividend rate
+        if dividend_rate and dividend_rate > 0:
+            logger.debug(f"{sym}: Forward dividend = {dividend_rate} {currency}")
+            return sym, {
+                'dividend_rate': float(dividend_rate),
+                'dividend_yield': float(dividend_yield) if dividend_yield else None,
+                'currency': currency
+            }
+        logger.debug(f"{sym}: No forward dividend data available")
+
+    except Exception as e:
+        logger.debug(f"Could not fetch dividend info for {sym}: {e}")
+
+    return sym, None
+
+
 def get_forward_dividends(symbols: List[str]) -> Dict[str, Dict]:
     """
     Fetches forward (indicated) annual dividend info from Yahoo Finance.
@@ -209,27 +356,10 @@ def get_forward_dividends(symbols: List[str]) -> Dict[str, Dict]:
     logger.info(f"Fetching forward dividend data for {len(symbols)} symbols...")
     results = {}
 
-    for sym in symbols:
-        try:
-            ticker = yf.Ticker(sym)
-            info = ticker.info
-
-            dividend_rate = info.get('dividendRate')
-            dividend_yield = info.get('dividendYield')
-            currency = info.get('currency')
-
-            # Only include if we have a valid dividend rate
-            if dividend_rate and dividend_rate > 0:
-                results[sym] = {
-                    'dividend_rate': float(dividend_rate),
-                    'dividend_yield': float(dividend_yield) if dividend_yield else None,
-                    'currency': currency
-                }
-                logger.debug(f"{sym}: Forward dividend = {dividend_rate} {currency}")
-            else:
-                logger.debug(f"{sym}: No forward dividend data available")
-
-        except Exception as e:
-            logger.debug(f"Could not fetch dividend info for {sym}: {e}")
+    # Lookups run concurrently; ex.map keeps results in input order
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(symbols))) as ex:
+        for sym, data in ex.map(_fetch_forward_dividend, symbols):
+            if data is not None:
+                results[sym] = data
 
     return results
\ No newline at end of file
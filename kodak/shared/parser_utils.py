@@ -2,6 +2,7 @@ import logging
 import uuid
 from typing import Dict, Any, List, Tuple
 
+import numpy as np
 import pandas as pd
 
 from kodak.shared.utils import clean_num as _clean_num, load_config
@@ -85,7 +86,7 @@ def validate_transaction(txn: Dict[str, Any], row_index: int = 0) -> List[str]:
     numeric_fields = ['quantity', 'price', 'amount', 'amount_local', 'exchange_rate', 'fee', 'fee_local']
     for field in numeric_fields:
         val = txn.get(field)
-        if val is not None and not isinstance(val, (int, float)):
+        if val is not None and not isinstance(val, (int, float, np.number)):
             errors.append(f"Row {row_index}: Field '{field}' must be numeric, got {type(val).__name__}")
 
     # Validate currency codes (should be 3 uppercase letters)
@@ -104,6 +105,58 @@ def validate_transaction(txn: Dict[str, Any], row_index: int = 0) -> List[str]:
     return errors
 
 
+def _flag_values(values: pd.Series, is_bad) -> np.ndarray:
+    """Evaluates is_bad once per distinct value and maps the verdict back onto every row."""
+    try:
+        bad = [v for v in values.unique() if is_bad(v)]
+    except TypeError:  # unhashable values: let the per-row check sort them out
+        return np.ones(len(values), dtype=bool)
+    return values.isin(bad).to_numpy()
+
+
+def _suspect_rows(txns: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Column-wise screen for rows that may fail validate_transaction.
+
+    Flags a superset of the invalid rows (over-flagging is harmless), so the
+    exact per-row messages only need to be built for the flagged rows.
+    """
+    def col(field):
+        # .get() keeps missing keys as None, exactly like validate_transaction sees them
+        return pd.Series([txn.get(field) for txn in txns], dtype=object)
+
+    suspect = np.zeros(len(txns), dtype=bool)
+
+    # Required fields: missing or falsy
+    for field in ['date', 'type', 'account_external_id']:
+        values = col(field)
+        suspect |= (values.isna() | values.isin(['', 0])).to_numpy()
+
+    # Date format (YYYY-MM-DD or similar)
+    def bad_date(v):
+        date_str = str(v).split(' ')[0]
+        return len(date_str) < 8 or '-' not in date_str
+    suspect |= _flag_values(col('date'), bad_date)
+
+    # Transaction type
+    suspect |= (~col('type').isin(VALID_TRANSACTION_TYPES)).to_numpy()
+
+    # Numeric fields: only columns that don't infer to a numeric dtype can hold bad values
+    for field in ['quantity', 'price', 'amount', 'amount_local', 'exchange_rate', 'fee', 'fee_local']:
+        values = col(field).infer_objects()
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            suspect |= values.notna().to_numpy()
+
+    # Currency codes (3 letters)
+    for field in ['currency', 'fee_currency']:
+        suspect |= _flag_values(col(field), lambda v: bool(v) and (not isinstance(v, str) or len(v) != 3))
+
+    # ISIN format (only logged, but keep the debug trail)
+    suspect |= _flag_values(col('isin'), lambda v: isinstance(v, str) and (len(v) != 12 or not v[:2].isalpha()))
+
+    return suspect
+
+
 def validate_parser_output(transactions: List[Dict[str, Any]], parser_name: str = "unknown") -> Tuple[bool, List[str]]:
     """
     Validates the complete output of a parser.
@@ -124,7 +177,15 @@ def validate_parser_output(transactions: List[Dict[str, Any]], parser_name: str
         logger.warning(f"Parser '{parser_name}' returned empty list")
         return True, []
 
-    for i, txn in enumerate(transactions):
+    # Screen all dict rows column-wise; only flagged rows get per-row checks
+    dict_rows = [i for i, txn in enumerate(transactions) if isinstance(txn, dict)]
+    flagged = set(range(len(transactions))).difference(dict_rows)
+    if dict_rows:
+        suspect = _suspect_rows([transactions[i] for i in dict_rows])
+        flagged.update(np.asarray(dict_rows)[suspect].tolist())
+
+    for i in sorted(flagged):
+        txn = transactions[i]
         if not isinstance(txn, dict):
             all_errors.append(f"Row {i}: Expected dict, got {type(txn).__name__}")
             continue
@@ -1,3 +1,4 @@
+import functools
 import hashlib
 import logging
 import os
@@ -5,8 +6,9 @@ import pandas as pd
 import yaml
 from typing import Optional, Union, Dict, Any
 
+@functools.lru_cache(maxsize=None)
 def load_config() -> Dict[str, Any]:
-    """Loads configuration from config.yaml in project root."""
+    """Loads configuration from config.yaml in project root (parsed once per process; treat as read-only)."""
     # Find project root (3 levels up from this file)
     root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     config_path = os.path.join(root_dir, 'config.yaml')
@@ -56,6 +58,13 @@ def clean_num(val: Union[str, float, int, None]) -> float:
     except ValueError:
         return 0.0
 
+def clean_num_series(values: pd.Series) -> pd.Series:
+    """Vectorized clean_num for a whole column. Missing or unparseable values become 0.0."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).fillna(0.0)
+    text = values.astype(str).str.replace(' ', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').fillna(0.0)
+
 def generate_txn_hash(date: str, account_id: str, type: str, symbol: str, amount: float) -> str:
     """Generates a stable hash to identify duplicate transactions."""
     # Ensure consistent string formatting
@@ -65,13 +74,14 @@ def generate_txn_hash(date: str, account_id: str, type: str, symbol: str, amount
     raw_str = f"{date_str}|{account_id}|{type}|{symbol}|{amt_str}"
     return hashlib.md5(raw_str.encode()).hexdigest()
 
+# Maps Python's "1,234.5" separators to Norwegian style "1 234,5"
+_LOCAL_SEPARATORS = str.maketrans({",": " ", ".": ","})
+
 def format_local(val: Union[float, int], decimals: int = 0) -> str:
     """Formats a number using Norwegian style (space for thousands, comma for decimal)."""
     if pd.isna(val):
         return "0"
     
-    # Format with commas as thousand separators and dots for decimals (standard Python)
-    formatted = f"{val:,.{decimals}f}"
-    
-    # Replace commas with spaces and dots with commas
-    return formatted.replace(",", " ").replace(".", ",")
+    # Format with commas as thousand separators and dots for decimals (standard Python),
+    # then swap the separators in a single pass
+    return f"{val:,.{decimals}f}".translate(_LOCAL_SEPARATORS)
@@ -2,11 +2,15 @@
 import pytest
 from datetime import datetime
 import pandas as pd
+import numpy as np
 
 from kodak.shared.calculations import (
     xirr,
+    xirr_many,
     get_adjusted_qty,
-    get_price_with_fallback
+    get_price_with_fallback,
+    _replay_cost_basis,
+    STEP_NONE, STEP_QTY, STEP_IN, STEP_OUT,
 )
 
 
@@ -83,6 +87,22 @@ class TestXirr:
         result = xirr(transactions)
         assert abs(result - 0.5) < 0.01
 
+    def test_many_matches_single(self):
+        """Batched solve should give each series its own known rate."""
+        series = [
+            [(datetime(2023, 1, 1), -1000.0), (datetime(2024, 1, 1), 2000.0)],
+            [],
+            [(datetime(2023, 1, 1), -1000.0), (datetime(2023, 7, 1), -1000.0), (datetime(2024, 1, 1), 2200.0)],
+            [(datetime(2024, 1, 1), 500.0)],
+        ]
+        results = xirr_many(series)
+        # Doubling in one year is 100%
+        assert abs(results[0] - 1.0) < 1e-4
+        # Root of -1000 - 1000/(1+r)^(181/365) + 2200/(1+r) = 0, found by bisection
+        assert abs(results[2] - 0.134377) < 1e-4
+        # Too few flows to solve
+        assert results[1] == 0.0 and results[3] == 0.0
+
 
 class TestGetAdjustedQty:
     """Tests for the stock split adjustment function."""
@@ -174,3 +194,25 @@ class TestGetPriceWithFallback:
         result = get_price_with_fallback("AAPL", price_dict, "2024-01-01", missing_log)
         assert result == 0.0
         # Note: missing_log population depends on DB state
+
+
+class TestReplayCostBasis:
+    """Tests for the average-cost replay kernel."""
+
+    def test_sell_reduces_cost_at_average(self):
+        """Selling half the shares should remove half the cost."""
+        steps = np.array([STEP_IN, STEP_IN, STEP_OUT])
+        qtys = np.array([10.0, 10.0, -10.0])
+        amts = np.array([-1000.0, -3000.0, 2500.0])
+        qty_cum, cost_cum = _replay_cost_basis(steps, qtys, amts)
+        assert qty_cum == [10.0, 20.0, 10.0]
+        assert cost_cum == [1000.0, 4000.0, 2000.0]
+
+    def test_split_keeps_cost_basis(self):
+        """Split withdrawal keeps cost; other rows leave the position alone."""
+        steps = np.array([STEP_IN, STEP_QTY, STEP_IN, STEP_NONE])
+        qtys = np.array([10.0, -10.0, 40.0, 0.0])
+        amts = np.array([-1000.0, 0.0, 0.0, 50.0])
+        qty_cum, cost_cum = _replay_cost_basis(steps, qtys, amts)
+        assert qty_cum[-1] == 40.0
+        assert cost_cum[-1] == 1000.0
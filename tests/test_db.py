@@ -0,0 +1,75 @@
+"""Tests for kodak/shared/db.py"""
+import os
+
+import pytest
+from kodak.shared import db
+
+
+@pytest.fixture
+def cache_env(tmp_path, monkeypatch):
+    """Points the DB and the disk cache at a scratch directory."""
+    db_file = tmp_path / 'portfolio.db'
+    db_file.write_bytes(b'v1')
+    monkeypatch.setattr(db, 'DB_PATH', str(db_file))
+    monkeypatch.setattr(db, 'CACHE_DIR', str(tmp_path / 'cache'))
+    return db_file
+
+
+class TestDiskCache:
+    """Tests for the disk_cache decorator."""
+
+    def test_hit_skips_call(self, cache_env):
+        """A second call with the same args should come from disk."""
+        calls = []
+
+        @db.disk_cache('probe')
+        def probe(x):
+            calls.append(x)
+            return {'x': x}
+
+        assert probe(1) == {'x': 1}
+        assert probe(1) == {'x': 1}
+        assert probe(2) == {'x': 2}
+        assert calls == [1, 2]
+
+    def test_db_change_invalidates(self, cache_env):
+        """Writing to the DB should force a recompute and drop stale entries."""
+        calls = []
+
+        @db.disk_cache('probe')
+        def probe():
+            calls.append(1)
+            return [len(calls)]
+
+        assert probe() == [1]
+        cache_env.write_bytes(b'v2-longer')
+        assert probe() == [2]
+        assert probe() == [2]
+        assert len(os.listdir(db.CACHE_DIR)) == 1
+
+    def test_empty_not_cached(self, cache_env):
+        """Empty results (e.g. a failed download) should not be stored."""
+        calls = []
+
+        @db.disk_cache('probe')
+        def probe():
+            calls.append(1)
+            return {}
+
+        probe(); probe()
+        assert len(calls) == 2
+
+    def test_max_age_expires(self, cache_env):
+        """Entries older than max_age should be recomputed."""
+        calls = []
+
+        @db.disk_cache('probe', max_age=60)
+        def probe():
+            calls.append(1)
+            return [len(calls)]
+
+        assert probe() == [1]
+        for entry in os.listdir(db.CACHE_DIR):
+            path = os.path.join(db.CACHE_DIR, entry)
+            os.utime(path, (os.path.getatime(path), os.path.getmtime(path) - 120))
+        assert probe() == [2]
@@ -1,4 +1,5 @@
 """Tests for scripts/shared/parser_utils.py"""
+import numpy as np
 import pytest
 from kodak.shared.parser_utils import (
     create_empty_transaction,
@@ -115,6 +116,18 @@ class TestValidateTransaction:
         errors = validate_transaction(txn)
         assert any('numeric' in e.lower() for e in errors)
 
+    def test_numpy_numeric_field(self):
+        """NumPy scalars (e.g. from pandas rows) count as numeric."""
+        txn = {
+            'date': '2024-01-15',
+            'type': 'BUY',
+            'account_external_id': 'ACC001',
+            'quantity': np.int64(10),
+            'price': np.float32(1.5)
+        }
+        errors = validate_transaction(txn)
+        assert not any('numeric' in e.lower() for e in errors)
+
     def test_invalid_currency_code(self):
         """Invalid currency code should return an error."""
         txn = {
@@ -156,6 +169,23 @@ class TestValidateParserOutput:
         is_valid, errors = validate_parser_output([], "test_parser")
         assert is_valid
 
+    def test_matches_row_validation(self):
+        """Batch validation reports exactly the per-row errors, in row order."""
+        transactions = [
+            {'date': '2024-01-15', 'type': 'BUY', 'account_external_id': 'ACC001', 'currency': 'USD', 'quantity': 1.0},
+            {'date': '2024/01/15', 'type': 'BUY', 'account_external_id': 'ACC001', 'currency': 'USD', 'quantity': 1.0},
+            'not a dict',
+            {'date': '2024-01-15', 'type': 'FOO', 'account_external_id': '', 'currency': 'US', 'quantity': '1'},
+        ]
+        expected = (
+            validate_transaction(transactions[1], 1)
+            + ["Row 2: Expected dict, got str"]
+            + validate_transaction(transactions[3], 3)
+        )
+        is_valid, errors = validate_parser_output(transactions, "test_parser")
+        assert not is_valid
+        assert errors == expected
+
     def test_invalid_row(self):
         """Invalid row should be caught."""
         transactions = [
@@ -1,6 +1,7 @@
 """Tests for scripts/shared/utils.py"""
 import pytest
-from kodak.shared.utils import clean_num, generate_txn_hash, load_config
+import pandas as pd
+from kodak.shared.utils import clean_num, clean_num_series, generate_txn_hash, load_config, format_local
 
 
 class TestCleanNum:
@@ -63,6 +64,33 @@ class TestGenerateTxnHash:
         assert hash1 == hash2
 
 
+class TestCleanNumSeries:
+    """Tests for the vectorized clean_num_series function."""
+
+    def test_matches_scalar(self):
+        """Mixed strings, numbers and blanks should match clean_num per element."""
+        values = pd.Series(["1 234,56", 42, None, "", "abc", 3.5], dtype=object)
+        assert clean_num_series(values).tolist() == [clean_num(v) for v in values]
+
+    def test_numeric_column(self):
+        """Numeric columns should only have NaN replaced."""
+        values = pd.Series([1, None, 2.5])
+        assert clean_num_series(values).tolist() == [1.0, 0.0, 2.5]
+
+
+class TestFormatLocal:
+    """Tests for Norwegian-style number formatting."""
+
+    def test_separators(self):
+        """Thousands use spaces and decimals use a comma."""
+        assert format_local(1234567.891, 2) == "1 234 567,89"
+        assert format_local(1234.4) == "1 234"
+
+    def test_missing_value(self):
+        """NaN should render as zero."""
+        assert format_local(float('nan')) == "0"
+
+
 class TestLoadConfig:
     """Tests for configuration loading."""
 